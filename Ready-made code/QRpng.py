@@ -1,7 +1,19 @@
 from PIL import Image
+import functools
+import numpy as np
 from typing import List
 from enum import Enum
 import qrcode
+import qrcode.exceptions
+
+try:
+    from numba import njit
+except ImportError:
+    # Numba необязательна: без нее ядра выполняются как обычный Python
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
 
 class ErrorCorrectionLevel(Enum):
 
@@ -10,6 +22,14 @@ class ErrorCorrectionLevel(Enum):
     Q = 2  # 25% коррекции ошибок
     H = 3  # 30% коррекции ошибок
 
+# Уровни qrcode в порядке ErrorCorrectionLevel.value
+_LEVEL_MAP = (
+    qrcode.constants.ERROR_CORRECT_L,
+    qrcode.constants.ERROR_CORRECT_M,
+    qrcode.constants.ERROR_CORRECT_Q,
+    qrcode.constants.ERROR_CORRECT_H,
+)
+
 class DataEncoder:
     
     def __init__(self, version: int, error_correction: ErrorCorrectionLevel):
@@ -38,27 +58,18 @@ class DataEncoder:
             
             return bits
             
-        except:
+        except (qrcode.exceptions.DataOverflowError, ValueError):
             
             return self._simple_encode(data)
     
     def _get_qrcode_error_level(self):
         
-        level_map = {
-            ErrorCorrectionLevel.L: qrcode.constants.ERROR_CORRECT_L,
-            ErrorCorrectionLevel.M: qrcode.constants.ERROR_CORRECT_M,
-            ErrorCorrectionLevel.Q: qrcode.constants.ERROR_CORRECT_Q,
-            ErrorCorrectionLevel.H: qrcode.constants.ERROR_CORRECT_H
-        }
-        return level_map.get(self.error_correction, qrcode.constants.ERROR_CORRECT_M)
+        return _LEVEL_MAP[self.error_correction.value]
     
     def _simple_encode(self, data: str) -> List[int]:
         
-        bits = []
-        
-        for byte in data.encode('utf-8'):
-            bits.extend([int(b) for b in format(byte, '08b')])
-        return bits
+        utf8_bytes = np.frombuffer(data.encode('utf-8'), dtype=np.uint8)
+        return np.unpackbits(utf8_bytes).tolist()
 
 class ReedSolomon:
     
@@ -66,155 +77,268 @@ class ReedSolomon:
     def encode(self, data: List[int], version: int, error_correction: ErrorCorrectionLevel) -> List[int]:
         return data
 
+# Явные сигнатуры: ядра компилируются (или берутся из кэша) при импорте,
+# а не при первом вызове внутри генерации
+# reserved - общая кэшированная карта, поэтому в сигнатуре она только для чтения
+@njit('int64(uint8[:, :], uint8[::1], Array(boolean, 2, "A", readonly=True))',
+      cache=True, boundscheck=False, fastmath=True)
+def _place_data_kernel(matrix, data, reserved):
+    
+    # Зигзаг по парам колонок справа налево; колонки 0-6 не заполняются
+    size = matrix.shape[0]
+    total = data.shape[0]
+    bit_index = 0
+    upward = True  # Начинаем снизу вверх
+    
+    for col in range(size-1, 6, -2):
+        for step in range(size):
+            row = size-1-step if upward else step
+            for dx in range(2):
+                x = col - dx
+                if bit_index < total and not reserved[row, x]:
+                    matrix[row, x] = data[bit_index]
+                    bit_index += 1
+        
+        upward = not upward  # Меняем направление
+        
+        if bit_index >= total:
+            break
+    
+    return bit_index
+
+@njit('int64(uint8[:, :])', cache=True, boundscheck=False, fastmath=True)
+def score_mask(matrix):
+    
+    # Штраф маски по четырем правилам ISO/IEC 18004 за один проход:
+    # серии >= 5 модулей, блоки 2x2, шаблоны поиска 1:1:3:1:1 и баланс
+    size = matrix.shape[0]
+    score = 0
+    dark = 0
+    col_run = np.zeros(size, dtype=np.int64)
+    col_window = np.zeros(size, dtype=np.int64)
+    
+    for y in range(size):
+        row_run = 0
+        row_window = 0
+        for x in range(size):
+            bit = int(matrix[y, x])
+            dark += bit
+            
+            # Правило 1: серии одного цвета по строке и по колонке
+            if x > 0 and bit == matrix[y, x-1]:
+                row_run += 1
+            else:
+                if row_run >= 5:
+                    score += row_run - 2
+                row_run = 1
+            if y > 0 and bit == matrix[y-1, x]:
+                col_run[x] += 1
+            else:
+                if col_run[x] >= 5:
+                    score += col_run[x] - 2
+                col_run[x] = 1
+            
+            # Правило 2: блоки 2x2 одного цвета
+            if (x > 0 and y > 0 and bit == matrix[y, x-1] and
+                    bit == matrix[y-1, x] and bit == matrix[y-1, x-1]):
+                score += 3
+            
+            # Правило 3: окно из 11 модулей 10111010000 / 00001011101
+            row_window = ((row_window << 1) | bit) & 0x7FF
+            if x >= 10 and (row_window == 0x5D0 or row_window == 0x05D):
+                score += 40
+            col_window[x] = ((col_window[x] << 1) | bit) & 0x7FF
+            if y >= 10 and (col_window[x] == 0x5D0 or col_window[x] == 0x05D):
+                score += 40
+        
+        if row_run >= 5:
+            score += row_run - 2
+    
+    for x in range(size):
+        if col_run[x] >= 5:
+            score += col_run[x] - 2
+    
+    # Правило 4: отклонение доли темных модулей от 50%
+    percentage = dark * 100 // (size * size)
+    score += (abs(percentage - 50) // 5) * 10
+    
+    return score
+
+# Биты уровня коррекции в информации о формате (ISO/IEC 18004, таблица 12)
+_FORMAT_EC_BITS = (0b01, 0b00, 0b11, 0b10)
+
+def _format_bits(error_correction: ErrorCorrectionLevel, mask_pattern: int) -> int:
+    
+    # 5 бит данных, 10 бит BCH(15,5) и маска 101010000010010
+    data = (_FORMAT_EC_BITS[error_correction.value] << 3) | mask_pattern
+    rem = data << 10
+    for i in range(14, 9, -1):
+        if (rem >> i) & 1:
+            rem ^= 0x537 << (i - 10)
+    return ((data << 10) | rem) ^ 0x5412
+
 class MatrixConstructor:
     
     
-    def __init__(self, version: int):
+    def __init__(self, version: int, error_correction: ErrorCorrectionLevel = ErrorCorrectionLevel.M):
         self.version = version
+        self.error_correction = error_correction
         self.size = (version - 1) * 4 + 21
-        self.matrix = [[False] * self.size for _ in range(self.size)]
+        self.matrix = np.zeros((self.size, self.size), dtype=np.uint8)
+        # Карты служебных модулей и масок общие для всех конструкторов версии
+        self._reserved = _build_reserved(version)
+        self._masks = _build_masks(version)
     
-    def build_matrix(self, data: List[int]) -> List[List[bool]]:
+    def build_matrix(self, data: List[int]) -> np.ndarray:
     
-        # Очищаем матрицу
-        self.matrix = [[False] * self.size for _ in range(self.size)]
+        # Новая матрица на каждый вызов: ранее возвращенный результат не меняется
+        self.matrix = np.zeros((self.size, self.size), dtype=np.uint8)
         
         # Добавляем все обязательные элементы
         self._add_finder_patterns()
         self._add_alignment_patterns() 
         self._add_timing_patterns()
         self._add_dark_module()
-        self._add_format_info()
         
         # Правильно размещаем данные
         self._add_data_correctly(data)
         
-        # Применяем маску
-        self._apply_mask()
+        # Выбираем маску с наименьшим штрафом и записываем ее в формат
+        mask_pattern = self._choose_mask()
+        self._apply_mask(mask_pattern)
+        self._add_format_info(mask_pattern)
         
         return self.matrix
     
     def _add_finder_patterns(self):
         
+        m = self.matrix
         patterns = [(0, 0), (self.size-7, 0), (0, self.size-7)]
         
         for x, y in patterns:
-            # Внешний черный квадрат 7x7
-            for i in range(7):
-                for j in range(7):
-                    self.matrix[y+j][x+i] = True
-            
-            # Внутренний белый квадрат 5x5
-            for i in range(1, 6):
-                for j in range(1, 6):
-                    self.matrix[y+j][x+i] = False
-            
-            # Внутренний черный квадрат 3x3  
-            for i in range(2, 5):
-                for j in range(2, 5):
-                    self.matrix[y+j][x+i] = True
+            m[y:y+7, x:x+7] = 1          # Внешний черный квадрат 7x7
+            m[y+1:y+6, x+1:x+6] = 0      # Внутренний белый квадрат 5x5
+            m[y+2:y+5, x+2:x+5] = 1      # Внутренний черный квадрат 3x3
     
     def _add_alignment_patterns(self):
        
         if self.version >= 2:
             x, y = self.size-7, self.size-7
+            m = self.matrix
             
-            # Черный квадрат 5x5
-            for i in range(-2, 3):
-                for j in range(-2, 3):
-                    if abs(i) == 2 or abs(j) == 2 or (i == 0 and j == 0):
-                        self.matrix[y+j][x+i] = True
+            # Черная рамка 5x5 и центральный модуль
+            m[y-2, x-2:x+3] = 1
+            m[y+2, x-2:x+3] = 1
+            m[y-2:y+3, x-2] = 1
+            m[y-2:y+3, x+2] = 1
+            m[y, x] = 1
     
     def _add_timing_patterns(self):
         
-        for i in range(8, self.size-8):
-            self.matrix[6][i] = (i % 2 == 0)
-            self.matrix[i][6] = (i % 2 == 0)
+        timing = (np.arange(8, self.size-8) & 1) ^ 1
+        self.matrix[6, 8:self.size-8] = timing
+        self.matrix[8:self.size-8, 6] = timing
     
     def _add_dark_module(self):
        
-        if 4*self.version + 9 < self.size:
-            self.matrix[8][4*self.version + 9] = True
+        # Строка 4*version+9 (= size-8), колонка 8, как в карте служебных модулей
+        self.matrix[4*self.version + 9, 8] = 1
     
-    def _add_format_info(self):
+    def _add_format_info(self, mask_pattern: int):
        
-        # Минимальная информация для распознавания
-        for i in range(8):
-            if i != 6:
-                self.matrix[8][i] = (i % 2 == 0)
-                self.matrix[i][8] = (i % 2 == 0)
-    
-    def _add_data_correctly(self, data: List[int]):
-        
-        bit_index = 0
+        # 15 бит формата: вдоль колонки 8 и вдоль строки 8, бит i = (bits >> i) & 1
+        bits = _format_bits(self.error_correction, mask_pattern)
         size = self.size
-        direction = -1  # Начинаем снизу вверх
-        
-        # Проходим парами колонок справа налево
-        for col in range(size-1, 0, -2):
+        for i in range(15):
+            bit = (bits >> i) & 1
             
-            if col <= 6:  # Пропускаем колонки с тайминг-паттерном
-                continue
-                
-            if direction == -1:  # Снизу вверх
-                for row in range(size-1, -1, -1):
-                    if self._place_data_bit(col, row, data, bit_index):
-                        bit_index += 1
-                    if self._place_data_bit(col-1, row, data, bit_index):
-                        bit_index += 1
-            else:  # Сверху вниз
-                for row in range(size):
-                    if self._place_data_bit(col, row, data, bit_index):
-                        bit_index += 1
-                    if self._place_data_bit(col-1, row, data, bit_index):
-                        bit_index += 1
+            # Вертикальная копия: у верхнего левого и нижнего левого паттернов
+            if i < 6:
+                self.matrix[i, 8] = bit
+            elif i < 8:
+                self.matrix[i+1, 8] = bit
+            else:
+                self.matrix[size-15+i, 8] = bit
             
-            direction *= -1  # Меняем направление
-            
-            if bit_index >= len(data):
-                break
+            # Горизонтальная копия: у верхнего правого и верхнего левого паттернов
+            if i < 8:
+                self.matrix[8, size-i-1] = bit
+            elif i < 9:
+                self.matrix[8, 15-i] = bit
+            else:
+                self.matrix[8, 15-i-1] = bit
     
-    def _place_data_bit(self, x: int, y: int, data: List[int], bit_index: int) -> bool:
+    def _add_data_correctly(self, data: List[int]):
         
-        if (0 <= x < self.size and 0 <= y < self.size and 
-            not self._is_reserved_area(x, y) and bit_index < len(data)):
-            self.matrix[y][x] = bool(data[bit_index])
-            return True
-        return False
+        bits = (np.asarray(data) != 0).astype(np.uint8)
+        _place_data_kernel(self.matrix, bits, self._reserved)
     
     def _is_reserved_area(self, x: int, y: int) -> bool:
         
-        # Позиционные паттерны
-        if (x < 7 and y < 7) or (x > self.size-8 and y < 7) or (x < 7 and y > self.size-8):
-            return True
-        
-        # Тайминг-паттерны
-        if x == 6 or y == 6:
-            return True
-        
-        # Выравнивающий паттерн
-        if self.version >= 2:
-            align_x, align_y = self.size-7, self.size-7
-            if abs(x - align_x) <= 2 and abs(y - align_y) <= 2:
-                return True
-        
-        # Темный модуль
-        if x == 8 and y == 4*self.version + 9:
-            return True
-            
-        # Зоны формата
-        if (x < 9 and y < 9) or (x > self.size-9 and y < 9) or (x < 9 and y > self.size-9):
-            return True
+        return bool(self._reserved[y, x])
+    
+    def _apply_mask(self, mask_pattern: int):
         
-        return False
+        self.matrix ^= self._masks[mask_pattern]
     
-    def _apply_mask(self):
+    def _choose_mask(self) -> int:
         
-        for y in range(self.size):
-            for x in range(self.size):
-                if not self._is_reserved_area(x, y):
-                    if (x + y) % 3 == 0:
-                        self.matrix[y][x] = not self.matrix[y][x]
+        # Оцениваем все 8 масок на уже размещенных данных вместе
+        # с информацией о формате, которую каждая маска запишет
+        scores = []
+        for mask_pattern in range(8):
+            self.matrix ^= self._masks[mask_pattern]
+            self._add_format_info(mask_pattern)
+            scores.append(score_mask(self.matrix))
+            self.matrix ^= self._masks[mask_pattern]
+        return scores.index(min(scores))
+
+@functools.lru_cache(maxsize=40)
+def _build_reserved(version: int) -> np.ndarray:
+    
+    # Карта служебных модулей reserved[y, x], одна на версию и только для чтения
+    size = (version - 1) * 4 + 21
+    reserved = np.zeros((size, size), dtype=bool)
+    
+    # Позиционные паттерны вместе с зонами формата
+    reserved[:9, :9] = True
+    reserved[:9, size-8:] = True
+    reserved[size-8:, :9] = True
+    
+    # Тайминг-паттерны
+    reserved[6, :] = True
+    reserved[:, 6] = True
+    
+    # Выравнивающий паттерн
+    if version >= 2:
+        reserved[size-9:size-4, size-9:size-4] = True
+    
+    # Темный модуль
+    reserved[4*version + 9, 8] = True
+    
+    reserved.setflags(write=False)
+    return reserved
+
+@functools.lru_cache(maxsize=40)
+def _build_masks(version: int) -> np.ndarray:
+    
+    # Все 8 масок ISO/IEC 18004 сразу, служебные модули не маскируются;
+    # одни на версию и только для чтения
+    size = (version - 1) * 4 + 21
+    y, x = np.indices((size, size))
+    masks = np.stack([
+        (y + x) % 2 == 0,
+        y % 2 == 0,
+        x % 3 == 0,
+        (y + x) % 3 == 0,
+        (y // 2 + x // 3) % 2 == 0,
+        (y * x) % 2 + (y * x) % 3 == 0,
+        ((y * x) % 2 + (y * x) % 3) % 2 == 0,
+        ((y + x) % 2 + (y * x) % 3) % 2 == 0,
+    ])
+    masks = (masks & ~_build_reserved(version)).astype(np.uint8)
+    masks.setflags(write=False)
+    return masks
 
 class QRCodeGenerator:
     
@@ -225,7 +349,7 @@ class QRCodeGenerator:
         
         self.encoder = DataEncoder(version, error_correction)
         self.error_corrector = ReedSolomon()
-        self.matrix_constructor = MatrixConstructor(version)
+        self.matrix_constructor = MatrixConstructor(version, error_correction)
     
     def generate_qr_code(self, url: str, output_filename: str = "my_qr_code.png", scale: int = 10):
         try:
@@ -243,18 +367,10 @@ class QRCodeGenerator:
             qr_matrix = self.matrix_constructor.build_matrix(final_data)
             
             # Создаем изображение
-            img_size = self.size * scale
-            img = Image.new('RGB', (img_size, img_size), 'white')
-            pixels = img.load()
-            
-            for y in range(self.size):
-                for x in range(self.size):
-                    color = (0, 0, 0) if qr_matrix[y][x] else (255, 255, 255)
-                    for dy in range(scale):
-                        for dx in range(scale):
-                            px = x * scale + dx
-                            py = y * scale + dy
-                            pixels[px, py] = color
+            # Черные модули -> 0, белые -> 255, затем масштабируем целыми блоками
+            small = (1 - np.asarray(qr_matrix, dtype=np.uint8)) * 255
+            big = np.kron(small, np.ones((scale, scale), dtype=np.uint8))
+            img = Image.fromarray(big)
             
             img.save(output_filename, "PNG")
             print(f"QR-код сохранен: {output_filename}")
@@ -278,31 +394,18 @@ def create_guaranteed_qr(url: str, filename: str = "my_qr.png"):
 def main():
     my_url = "https://asbasket.ru/"  #ССЫЛКА
     
-
-    
-    
-    fixed_generator = QRCodeGenerator(version=2)
-    fixed_success = fixed_generator.generate_qr_code(
-        url=my_url,
-        output_filename="my_qr.png",
-        scale=12
-    )
-    
-    
+    # Собственный генератор пока без Рида-Соломона, поэтому итоговый
+    # my_qr.png всегда строит библиотека qrcode - второй проход не нужен
     guaranteed_success = create_guaranteed_qr(
         url=my_url, 
         filename="my_qr.png"
     )
     
     print("\n" + "=" * 50)
-    if fixed_success:
-        print(" QR-код создан: my_qr.png")
-    else:
-        print(" QR-код не создан")
-    
     if guaranteed_success:
         print("QR-код создан: my_qr.png")
-        
+    else:
+        print(" QR-код не создан")
     
     print("=" * 50)
 
@@ -11,13 +11,22 @@ Example:
 """
 
 import sys
-import os
+from functools import lru_cache
 from typing import Dict, List, Optional, Tuple
 
-# Add the package directory to path for imports (legacy compatibility)
-_package_dir = os.path.dirname(os.path.abspath(__file__))
-if _package_dir not in sys.path:
-    sys.path.insert(0, _package_dir)
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    # Numba is optional: without it the kernels run as plain Python
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
 
 
 # ========================================
@@ -152,6 +161,20 @@ ALIGNMENT_PATTERN_POSITIONS = {
     40: [6, 30, 58, 86, 114, 142, 170],
 }
 
+# Alignment pattern (5x5): dark ring, light ring, dark center
+_ALIGNMENT_PATTERN = np.array([
+    [1, 1, 1, 1, 1],
+    [1, 0, 0, 0, 1],
+    [1, 0, 1, 0, 1],
+    [1, 0, 0, 0, 1],
+    [1, 1, 1, 1, 1],
+], dtype=np.uint8)
+
+# Finder-like sequences penalized by mask evaluation rule 3, as 11-bit
+# integers read MSB first: 10111010000 and 00001011101
+_FINDER_LIKE_WIDTH = 11
+_FINDER_LIKE_PATTERNS = (0b10111010000, 0b00001011101)
+
 
 # Format information table (15 bits)
 # Index is (error_correction << 3) | mask_pattern
@@ -240,6 +263,12 @@ VERSION_INFO_TABLE = [
 # Alphanumeric character set for QR codes
 ALPHANUMERIC_CHARS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:'
 
+# ASCII code -> alphanumeric value lookup table (-1 for unsupported characters)
+_ALPHANUMERIC_LUT = np.full(128, -1, dtype=np.int8)
+for _value, _char in enumerate(ALPHANUMERIC_CHARS):
+    _ALPHANUMERIC_LUT[ord(_char)] = _value
+del _value, _char
+
 
 # Generator polynomials for Reed-Solomon error correction
 # Index is the number of error correction codewords
@@ -305,6 +334,12 @@ def get_capacity(version: int, error_correction: ErrorCorrectionLevel, mode: Enc
 # DATA ENCODER
 # ========================================
 
+@lru_cache(maxsize=None)
+def _padding_value(pad_bytes: int) -> int:
+    """Alternating 0xEC 0x11 pad codewords, pad_bytes of them, as one integer"""
+    return int.from_bytes((b'\xec\x11' * ((pad_bytes + 1) // 2))[:pad_bytes], 'big')
+
+
 class DataEncoder:
     """Encodes data into QR code format"""
 
@@ -365,9 +400,9 @@ class DataEncoder:
         return counts[mode]
 
     @staticmethod
-    def encode_numeric(data: str) -> List[int]:
-        """Encode numeric data"""
-        bits = []
+    def encode_numeric(data: str) -> Tuple[int, int]:
+        """Encode numeric data, returns (bit buffer, bit count)"""
+        buf, nbits = 0, 0
 
         # Process in groups of 3 digits
         for i in range(0, len(data), 3):
@@ -381,114 +416,97 @@ class DataEncoder:
             else:  # 1 digit
                 bit_count = 4
 
-            # Convert to binary (MSB first)
-            for j in range(bit_count - 1, -1, -1):
-                bits.append((value >> j) & 1)
+            buf = (buf << bit_count) | value
+            nbits += bit_count
 
-        return bits
+        return buf, nbits
 
     @staticmethod
-    def encode_alphanumeric(data: str) -> List[int]:
-        """Encode alphanumeric data"""
-        bits = []
-        data = data.upper()
-
-        # Character to value mapping
-        char_values = {char: i for i, char in enumerate(ALPHANUMERIC_CHARS)}
-
-        # Process in pairs
-        for i in range(0, len(data), 2):
-            if i + 1 < len(data):
-                # Two characters
-                val1 = char_values[data[i]]
-                val2 = char_values[data[i + 1]]
-                value = val1 * 45 + val2
-                bit_count = 11
-            else:
-                # Single character
-                value = char_values[data[i]]
-                bit_count = 6
-
-            # Convert to binary (MSB first)
-            for j in range(bit_count - 1, -1, -1):
-                bits.append((value >> j) & 1)
-
-        return bits
+    def encode_alphanumeric(data: str) -> Tuple[int, int]:
+        """Encode alphanumeric data, returns (bit buffer, bit count)"""
+        # Character to value mapping through the ASCII lookup table
+        codes = np.frombuffer(data.upper().encode('ascii'), dtype=np.uint8)
+        values = _ALPHANUMERIC_LUT[codes]
+        if (values < 0).any():
+            raise ValueError("Data contains characters outside the alphanumeric set")
+        values = values.astype(np.uint16)
+
+        # Pairs take 11 bits, a trailing single character takes 6 bits
+        full_pairs = len(values) // 2
+        pairs = values[0:2 * full_pairs:2] * 45 + values[1:2 * full_pairs:2]
+        bits = np.unpackbits(pairs.astype('>u2').view(np.uint8)).reshape(-1, 16)[:, 5:].ravel()
+        if len(values) % 2:
+            tail = np.unpackbits(values[-1:].astype('>u2').view(np.uint8))[10:]
+            bits = np.concatenate([bits, tail])
+
+        nbits = len(bits)
+        buf = int.from_bytes(np.packbits(bits).tobytes(), 'big') >> (-nbits % 8)
+        return buf, nbits
 
     @staticmethod
-    def encode_byte(data: str) -> List[int]:
-        """Encode byte data (UTF-8)"""
-        bits = []
-
-        # Encode as UTF-8 bytes
+    def encode_byte(data: str) -> Tuple[int, int]:
+        """Encode byte data (UTF-8), returns (bit buffer, bit count)"""
         utf8_bytes = data.encode('utf-8')
-        for byte_value in utf8_bytes:
-            # Convert byte to 8 bits (MSB first)
-            for j in range(7, -1, -1):
-                bits.append((byte_value >> j) & 1)
-
-        return bits
+        return int.from_bytes(utf8_bytes, 'big'), 8 * len(utf8_bytes)
 
     @staticmethod
-    def encode_kanji(data: str) -> List[int]:
+    def encode_kanji(data: str) -> Tuple[int, int]:
         """Encode Kanji data (Shift JIS)"""
-        bits = []
-
         # Simplified Kanji encoding
         # In a full implementation, this would handle Shift JIS encoding
         # For now, fall back to byte encoding
         return DataEncoder.encode_byte(data)
 
     @staticmethod
-    def encode(data: str, mode: EncodingMode, version: int) -> List[int]:
-        """Main encoding function"""
-        bits = []
-
-        # Add mode indicator (4 bits, MSB first)
-        mode_bits = DataEncoder.get_mode_indicator(mode)
-        bits.extend(mode_bits)
-
-        # Add character count (MSB first)
+    def encode(data: str, mode: EncodingMode, version: int) -> Tuple[int, int]:
+        """Main encoding function, returns (bit buffer, bit count) with MSB first"""
+        # Mode indicator (4 bits; the mode value is the indicator itself)
+        # followed by the character count, truncated to its field width
         char_count = len(data)
         count_bits = DataEncoder.get_char_count_bits(mode, version)
-        for i in range(count_bits - 1, -1, -1):
-            bits.append((char_count >> i) & 1)
+        buf = (mode << count_bits) | (char_count & ((1 << count_bits) - 1))
+        nbits = 4 + count_bits
 
         # Add encoded data
         if mode == EncodingMode.NUMERIC:
-            bits.extend(DataEncoder.encode_numeric(data))
+            data_buf, data_nbits = DataEncoder.encode_numeric(data)
         elif mode == EncodingMode.ALPHANUMERIC:
-            bits.extend(DataEncoder.encode_alphanumeric(data))
+            data_buf, data_nbits = DataEncoder.encode_alphanumeric(data)
         elif mode == EncodingMode.BYTE:
-            bits.extend(DataEncoder.encode_byte(data))
+            data_buf, data_nbits = DataEncoder.encode_byte(data)
         elif mode == EncodingMode.KANJI:
-            bits.extend(DataEncoder.encode_kanji(data))
+            data_buf, data_nbits = DataEncoder.encode_kanji(data)
+        else:
+            data_buf, data_nbits = 0, 0
 
-        return bits
+        return (buf << data_nbits) | data_buf, nbits + data_nbits
 
     @staticmethod
-    def add_terminator_and_padding(bits: List[int], total_bits: int) -> List[int]:
+    def add_terminator_and_padding(bits: Tuple[int, int], total_bits: int) -> Tuple[int, int]:
         """Add terminator and padding to reach required length"""
-        result = bits.copy()
+        buf, nbits = bits
 
         # Add terminator (up to 4 zeros)
-        terminator_length = min(4, total_bits - len(result))
-        result.extend([0] * terminator_length)
+        terminator_length = max(0, min(4, total_bits - nbits))
+        buf <<= terminator_length
+        nbits += terminator_length
 
         # Pad to byte boundary
-        while len(result) % 8 != 0:
-            result.append(0)
+        align = -nbits % 8
+        buf <<= align
+        nbits += align
 
         # Add padding bytes (0xEC, 0x11 alternating)
-        padding_patterns = [[1, 1, 1, 0, 1, 1, 0, 0], [0, 0, 0, 1, 0, 0, 0, 1]]
-        pattern_index = 0
-
-        while len(result) < total_bits:
-            result.extend(padding_patterns[pattern_index])
-            pattern_index = (pattern_index + 1) % 2
+        pad_bytes = max(0, (total_bits - nbits + 7) // 8)
+        buf = (buf << (8 * pad_bytes)) | _padding_value(pad_bytes)
+        nbits += 8 * pad_bytes
 
         # Truncate if too long (shouldn't happen in correct usage)
-        return result[:total_bits]
+        if nbits > total_bits:
+            buf >>= nbits - total_bits
+            nbits = total_bits
+
+        return buf, nbits
 
 
 # ========================================
@@ -503,6 +521,10 @@ class GaloisField:
         self.log_table = [0] * 256
         self._init_tables()
 
+        # NumPy copies of the tables for vectorized lookups
+        self.exp = np.array(self.exp_table, dtype=np.uint8)
+        self.log = np.array(self.log_table, dtype=np.int16)
+
     def _init_tables(self):
         """Initialize exponential and logarithmic tables"""
         x = 1
@@ -545,36 +567,79 @@ class GaloisField:
         return self.exp_table[255 - self.log_table[x]]
 
 
+# Shared field instance: the tables never change once built
+GF = GaloisField()
+
+
+@njit('void(uint8[::1], uint8[::1], uint8[::1], int16[::1], int64)', cache=True, boundscheck=False)
+def _rs_encode(message, generator, exp_table, log_table, data_len):
+    """Synthetic division of message (data followed by zeros) in place"""
+    size = len(message)
+    for i in range(data_len):
+        lead = message[i]
+        if lead != 0:
+            # Use inverse of leading coefficient for division: its log is
+            # 255 - log(lead), and the doubled exp table covers the sum
+            # below without a modulo
+            factor_log = 255 - log_table[lead]
+            for j in range(len(generator)):
+                if i + j < size:
+                    value = message[i + j]
+                    if value != 0:
+                        value = exp_table[log_table[value] + factor_log]
+                    message[i + j] = value ^ generator[j]
+
+
 class ReedSolomonEncoder:
     """Reed-Solomon encoder for QR codes"""
 
+    gf = GF
+
+    # Generator polynomials built on demand, keyed by ECC count
+    _generator_cache: Dict[int, List[int]] = {}
+
+    # The same polynomials as uint8 arrays, in the order the kernel reads them
+    _generator_arrays: Dict[int, np.ndarray] = {}
+
     def __init__(self):
-        self.gf = GaloisField()
+        # Work buffer reused across blocks; QR blocks never exceed 256 codewords
+        self._buf = np.zeros(256, dtype=np.uint8)
 
     def encode(self, data: List[int], ecc_count: int) -> List[int]:
         """Encode data with Reed-Solomon error correction"""
         # Используем предопределенные полиномы или создаем их
-        generator = self._get_generator_polynomial(ecc_count)
-
-        # Создаем копию данных с нулями для ECC
-        message = data + [0] * ecc_count
+        gen = self._generator_arrays.get(ecc_count)
+        if gen is None:
+            gen = np.asarray(self._get_generator_polynomial(ecc_count), dtype=np.uint8)
+            self._generator_arrays[ecc_count] = gen
+
+        # Создаем копию данных с нулями для ECC в рабочем буфере
+        length = len(data) + ecc_count
+        if length > len(self._buf):
+            self._buf = np.zeros(length, dtype=np.uint8)
+        message = self._buf[:length]
+        message[:len(data)] = data
+        message[len(data):] = 0
 
         # Reed-Solomon encoding using synthetic division
-        for i in range(len(data)):
-            if message[i] != 0:
-                # Use inverse of leading coefficient for division
-                factor = self.gf.inverse(message[i])
-                for j in range(len(generator)):
-                    if i + j < len(message):
-                        message[i + j] = self.gf.mul(message[i + j], factor) ^ generator[j]
+        if NUMBA_AVAILABLE:
+            _rs_encode(message, gen, self.gf.exp, self.gf.log, len(data))
+        else:
+            # Plain Python is much faster on bytearray and list tables,
+            # where every lookup is a small int instead of a NumPy scalar
+            work = bytearray(message.tobytes())
+            _rs_encode(work, gen.tobytes(), self.gf.exp_table, self.gf.log_table, len(data))
+            message[:] = np.frombuffer(work, dtype=np.uint8)
 
         # Возвращаем только ECC кодовые слова
-        return message[-ecc_count:]
+        return message[-ecc_count:].tolist()
 
     def _get_generator_polynomial(self, ecc_count: int) -> List[int]:
         """Get generator polynomial for given ECC count"""
         if ecc_count in GENERATOR_POLYNOMIALS:
             return GENERATOR_POLYNOMIALS[ecc_count]
+        if ecc_count in self._generator_cache:
+            return self._generator_cache[ecc_count]
 
         # Создаем генераторный полином (α^0, α^1, α^2, ..., α^{ecc_count-1})
         # (x - α^0)(x - α^1)...(x - α^{ecc_count-1})
@@ -583,24 +648,30 @@ class ReedSolomonEncoder:
             # Умножаем на (x - α^i)
             generator = self._multiply_polynomials(generator, [1, self.gf.exp_table[i]])
 
+        self._generator_cache[ecc_count] = generator
         return generator
 
     def _multiply_polynomials(self, a: List[int], b: List[int]) -> List[int]:
         """Умножение полиномов в GF(256)"""
-        result = [0] * (len(a) + len(b) - 1)
-        for i in range(len(a)):
-            if a[i] != 0:
-                for j in range(len(b)):
-                    if b[j] != 0:
-                        result[i + j] ^= self.gf.mul(a[i], b[j])
-        return result
+        a_arr = np.asarray(a, dtype=np.uint8)
+        b_arr = np.asarray(b, dtype=np.uint8)
+
+        # Все попарные произведения a[i] * b[j] через таблицы логарифмов
+        log_sum = self.gf.log[a_arr][:, None] + self.gf.log[b_arr][None, :]
+        nonzero = (a_arr[:, None] != 0) & (b_arr[None, :] != 0)
+        products = np.where(nonzero, self.gf.exp[log_sum], 0).astype(np.uint8)
+
+        # XOR-свертка по антидиагоналям: произведение a[i] * b[j] идет в степень i + j
+        degrees = np.arange(len(a))[:, None] + np.arange(len(b))[None, :]
+        result = np.zeros(len(a) + len(b) - 1, dtype=np.uint8)
+        np.bitwise_xor.at(result, degrees.ravel(), products.ravel())
+        return result.tolist()
 
 
 class ReedSolomonDecoder:
     """Reed-Solomon decoder for error correction (optional)"""
 
-    def __init__(self):
-        self.gf = GaloisField()
+    gf = GF
 
     def decode(self, received: List[int], ecc_count: int) -> List[int]:
         """Attempt to decode and correct errors"""
@@ -614,256 +685,330 @@ class ReedSolomonDecoder:
 # QR MATRIX
 # ========================================
 
+@njit('int64(uint8[:, ::1])', cache=True, boundscheck=False)
+def _penalty_score(m):
+    """All four penalty rules in one row pass and one column pass
+
+    Run lengths, 2x2 blocks, rolling 11-bit finder-like windows and the
+    dark count are tracked together, so the matrix is read only twice.
+    """
+    pattern1, pattern2 = _FINDER_LIKE_PATTERNS
+    size = m.shape[0]
+    score = 0
+    black_count = 0
+
+    # Rows: rules 1 and 3 along the row, rule 2 with the next row, rule 4
+    for r in range(size):
+        run = 1
+        window = 0
+        for c in range(size):
+            cell = m[r, c]
+            black_count += cell
+            if c > 0:
+                if cell == m[r, c - 1]:
+                    run += 1
+                else:
+                    if run >= 5:
+                        score += run - 2
+                    run = 1
+                if r + 1 < size and cell == m[r, c - 1] and cell == m[r + 1, c - 1] and cell == m[r + 1, c]:
+                    score += 3
+            window = ((window << 1) | cell) & 0x7FF
+            if c >= _FINDER_LIKE_WIDTH - 1 and (window == pattern1 or window == pattern2):
+                score += 40
+        if run >= 5:
+            score += run - 2
+
+    # Columns: rules 1 and 3 along the column
+    for c in range(size):
+        run = 1
+        window = 0
+        for r in range(size):
+            cell = m[r, c]
+            if r > 0:
+                if cell == m[r - 1, c]:
+                    run += 1
+                else:
+                    if run >= 5:
+                        score += run - 2
+                    run = 1
+            window = ((window << 1) | cell) & 0x7FF
+            if r >= _FINDER_LIKE_WIDTH - 1 and (window == pattern1 or window == pattern2):
+                score += 40
+        if run >= 5:
+            score += run - 2
+
+    percentage = (black_count * 100) // (size * size)
+    score += (abs(percentage - 50) // 5) * 10
+    return score
+
+
+# The eight data mask conditions, one function each, indexed by mask pattern.
+# They work on plain ints as well as on broadcast index arrays.
+_MASK_FUNCTIONS = (
+    lambda row, col: (row + col) % 2 == 0,
+    lambda row, col: row % 2 == 0,
+    lambda row, col: col % 3 == 0,
+    lambda row, col: (row + col) % 3 == 0,
+    lambda row, col: (row // 2 + col // 3) % 2 == 0,
+    lambda row, col: ((row * col) % 2 + (row * col) % 3) == 0,
+    lambda row, col: ((row * col) % 2 + (row * col) % 3) % 2 == 0,
+    lambda row, col: ((row + col) % 2 + (row * col) % 3) % 2 == 0,
+)
+
+
+@lru_cache(maxsize=None)
+def _mask_bitmap(size: int, mask_pattern: int) -> np.ndarray:
+    """Cells flipped by a data mask pattern, as a read-only bool array"""
+    row, col = np.ogrid[:size, :size]
+    if 0 <= mask_pattern < len(_MASK_FUNCTIONS):
+        bitmap = _MASK_FUNCTIONS[mask_pattern](row, col)
+    else:
+        bitmap = np.zeros((size, size), dtype=bool)
+    bitmap = np.broadcast_to(bitmap, (size, size)).copy()
+    bitmap.setflags(write=False)
+    return bitmap
+
+
+@lru_cache(maxsize=None)
+def _alignment_mask(version: int) -> np.ndarray:
+    """5x5 footprints around every alignment center pair, as a read-only bool array"""
+    size = version * 4 + 17
+    mask = np.zeros((size, size), dtype=bool)
+
+    # Centers skipped for overlapping a finder are included too: their
+    # footprint has always been kept out of the data area
+    positions = ALIGNMENT_PATTERN_POSITIONS.get(version, [])
+    for center_row in positions:
+        for center_col in positions:
+            mask[max(center_row - 2, 0):center_row + 3, max(center_col - 2, 0):center_col + 3] = True
+
+    mask.setflags(write=False)
+    return mask
+
+
+@lru_cache(maxsize=None)
+def _data_cell_mask(version: int) -> np.ndarray:
+    """Cells of the data area for a version, as a read-only bool array"""
+    size = version * 4 + 17
+    mask = np.ones((size, size), dtype=bool)
+
+    # Finder patterns and separators
+    mask[:9, :9] = False
+    mask[:9, size - 8:] = False
+    mask[size - 8:, :9] = False
+
+    # Timing patterns
+    mask[6, :] = False
+    mask[:, 6] = False
+
+    # Dark module
+    mask[size - 8, 8] = False
+
+    # Alignment patterns
+    mask &= ~_alignment_mask(version)
+
+    # Format areas (will be filled separately)
+    mask[8, :] = False
+    mask[:, 8] = False
+
+    mask.setflags(write=False)
+    return mask
+
+
+@lru_cache(maxsize=None)
+def _placement_indices(version: int) -> np.ndarray:
+    """(row, col) of every data cell in data placement order, read-only"""
+    size = version * 4 + 17
+    data_cells = _data_cell_mask(version)
+    positions = []
+
+    # QR code standard data placement algorithm
+    # Process columns from right to left, starting from column size-1
+    # For each column, zigzag: up for even columns, down for odd columns
+    for col in range(size - 1, -1, -1):
+        # Skip timing column
+        if col == 6:
+            continue
+
+        # Determine direction: alternate based on column parity
+        if col % 2 == (size - 1) % 2:
+            # Up direction: bottom to top
+            row_range = range(size - 1, -1, -1)
+        else:
+            # Down direction: top to bottom
+            row_range = range(size)
+
+        for row in row_range:
+            # Skip timing row
+            if row != 6 and data_cells[row, col]:
+                positions.append((row, col))
+
+    indices = np.array(positions, dtype=np.uint16).reshape(-1, 2)
+    indices.setflags(write=False)
+    return indices
+
+
+def _draw_finder_pattern(matrix: np.ndarray, reserved: np.ndarray, row: int, col: int):
+    """Draw a single finder pattern"""
+    # Outer black square (7x7)
+    matrix[row:row + 7, col:col + 7] = 1
+    # Inner white square (5x5)
+    matrix[row + 1:row + 6, col + 1:col + 6] = 0
+    # Inner black square (3x3)
+    matrix[row + 2:row + 5, col + 2:col + 5] = 1
+    reserved[row:row + 7, col:col + 7] = True
+
+
+def _overlaps_finder(size: int, row: int, col: int) -> bool:
+    """Check if alignment pattern overlaps with finder patterns"""
+    finder_positions = [(3, 3), (size - 4, 3), (3, size - 4)]
+
+    for fr, fc in finder_positions:
+        # Alignment pattern (5x5) should not be within 4 units of finder pattern center (7x7)
+        # This prevents visual overlap and maintains proper spacing
+        if abs(row - fr) <= 4 and abs(col - fc) <= 4:
+            return True
+    return False
+
+
+def _draw_alignment_pattern(matrix: np.ndarray, reserved: np.ndarray, center_row: int, center_col: int):
+    """Draw a single alignment pattern (5x5)"""
+    # Alignment pattern structure:
+    # ■ ■ ■ ■ ■
+    # ■ □ □ □ ■
+    # ■ □ ■ □ ■
+    # ■ □ □ □ ■
+    # ■ ■ ■ ■ ■
+
+    area = (slice(center_row - 2, center_row + 3), slice(center_col - 2, center_col + 3))
+    matrix[area] = _ALIGNMENT_PATTERN
+    reserved[area] = True
+
+
+@lru_cache(maxsize=40)
+def _build_skeleton(version: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Function patterns and their reserved mask for a version, read-only"""
+    size = version * 4 + 17
+    matrix = np.zeros((size, size), dtype=np.uint8)
+    # Cells already claimed by function patterns (replaces the None sentinel)
+    reserved = np.zeros((size, size), dtype=bool)
+
+    # Finder patterns
+    for row, col in [(0, 0), (size - 7, 0), (0, size - 7)]:
+        _draw_finder_pattern(matrix, reserved, row, col)
+
+    # Separators (white borders around finder patterns)
+    separators = [
+        # Horizontal: top-left, top-right, bottom-left
+        (7, slice(0, 8)), (7, slice(size - 8, size)), (size - 8, slice(0, 8)),
+        # Vertical: top-left, top-right, bottom-left
+        (slice(0, 8), 7), (slice(0, 8), size - 8), (slice(size - 8, size), 7),
+    ]
+    for index in separators:
+        matrix[index] = 0
+        reserved[index] = True
+
+    # Timing patterns (row 6 and column 6)
+    timing = (np.arange(8, size - 8) - 8) % 2 == 0
+    matrix[6, 8:size - 8] = timing
+    reserved[6, 8:size - 8] = True
+    matrix[8:size - 8, 6] = timing
+    reserved[8:size - 8, 6] = True
+
+    # Alignment patterns, skipping those that overlap the finder patterns
+    positions = ALIGNMENT_PATTERN_POSITIONS.get(version, [])
+    for center_row in positions:
+        for center_col in positions:
+            if not _overlaps_finder(size, center_row, center_col):
+                _draw_alignment_pattern(matrix, reserved, center_row, center_col)
+
+    # Dark module
+    matrix[size - 8, 8] = 1
+    reserved[size - 8, 8] = True
+
+    matrix.setflags(write=False)
+    reserved.setflags(write=False)
+    return matrix, reserved
+
+
+def _pack_rows(lines: np.ndarray) -> int:
+    """Pack a 0/1 matrix into one integer, rows separated by a zero bit"""
+    rows, cols = lines.shape
+    padded = np.zeros((rows, cols + 1), dtype=np.uint8)
+    padded[:, :cols] = lines
+    return int.from_bytes(np.packbits(padded).tobytes(), 'big') >> (-padded.size % 8)
+
+
+def _popcount(value: int) -> int:
+    """Number of set bits of a non-negative integer"""
+    return bin(value).count('1')
+
+
+if hasattr(int, 'bit_count'):  # Python 3.10+
+    _popcount = int.bit_count
+
+
+@lru_cache(maxsize=None)
+def _neighbour_pair_bits(rows: int, cols: int) -> int:
+    """Bits of _pack_rows output for modules that have a left neighbour in their row"""
+    pairs = np.zeros((rows, cols), dtype=np.uint8)
+    pairs[:, 1:] = 1
+    return _pack_rows(pairs)
+
+
 class QRMatrix:
     """QR code matrix representation"""
 
     def __init__(self, version: int):
         self.version = version
         self.size = version * 4 + 17
-        self.matrix: List[List[Optional[bool]]] = [
-            [None for _ in range(self.size)] for _ in range(self.size)
-        ]
-        self._place_finder_patterns()
-        self._place_separators()
-        self._place_timing_patterns()
-        self._place_alignment_patterns()
-        self._place_dark_module()
-        self._reserve_format_areas()
-
-    def _place_finder_patterns(self):
-        """Place the three finder patterns"""
-        positions = [(0, 0), (self.size - 7, 0), (0, self.size - 7)]
-
-        for row, col in positions:
-            self._draw_finder_pattern(row, col)
-
-    def _draw_finder_pattern(self, row: int, col: int):
-        """Draw a single finder pattern"""
-        # Outer black square (7x7)
-        for i in range(7):
-            for j in range(7):
-                if 0 <= row + i < self.size and 0 <= col + j < self.size:
-                    self.matrix[row + i][col + j] = True
-
-        # Inner white square (5x5)
-        for i in range(1, 6):
-            for j in range(1, 6):
-                if 0 <= row + i < self.size and 0 <= col + j < self.size:
-                    self.matrix[row + i][col + j] = False
-
-        # Inner black square (3x3)
-        for i in range(2, 5):
-            for j in range(2, 5):
-                if 0 <= row + i < self.size and 0 <= col + j < self.size:
-                    self.matrix[row + i][col + j] = True
-
-    def _place_separators(self):
-        """Place separator patterns (white borders around finder patterns)"""
-        # Horizontal separators
-        for col in range(8):
-            # Top-left finder separator
-            if 7 < self.size:
-                self.matrix[7][col] = False
-            # Top-right finder separator
-            if self.size - 8 + col < self.size:
-                self.matrix[7][self.size - 8 + col] = False
-            # Bottom-left finder separator
-            if self.size - 8 < self.size:
-                self.matrix[self.size - 8][col] = False
-
-        # Vertical separators
-        for row in range(8):
-            # Top-left finder separator
-            if 7 < self.size:
-                self.matrix[row][7] = False
-            # Top-right finder separator
-            if self.size - 8 < self.size:
-                self.matrix[row][self.size - 8] = False
-            # Bottom-left finder separator
-            if self.size - 8 + row < self.size and 7 < self.size:
-                self.matrix[self.size - 8 + row][7] = False
-
-    def _place_timing_patterns(self):
-        """Place timing patterns"""
-        # Horizontal timing pattern (row 6)
-        for col in range(8, self.size - 8):
-            if col < self.size:
-                self.matrix[6][col] = ((col - 8) % 2 == 0)
-
-        # Vertical timing pattern (column 6)
-        for row in range(8, self.size - 8):
-            if row < self.size:
-                self.matrix[row][6] = ((row - 8) % 2 == 0)
-
-    def _place_alignment_patterns(self):
-        """Place alignment patterns"""
-        positions = ALIGNMENT_PATTERN_POSITIONS.get(self.version, [])
-
-        for center_row in positions:
-            for center_col in positions:
-                # Skip if overlaps with finder patterns
-                if self._overlaps_finder(center_row, center_col):
-                    continue
-
-                self._draw_alignment_pattern(center_row, center_col)
+        # Start from the cached function-pattern skeleton for this version
+        matrix, reserved = _build_skeleton(version)
+        self.matrix = matrix.copy()
+        self.reserved = reserved.copy()
 
-    def _overlaps_finder(self, row: int, col: int) -> bool:
-        """Check if alignment pattern overlaps with finder patterns"""
-        finder_positions = [(3, 3), (self.size - 4, 3), (3, self.size - 4)]
-
-        for fr, fc in finder_positions:
-            # Alignment pattern (5x5) should not be within 4 units of finder pattern center (7x7)
-            # This prevents visual overlap and maintains proper spacing
-            if abs(row - fr) <= 4 and abs(col - fc) <= 4:
-                return True
-        return False
-
-    def _draw_alignment_pattern(self, center_row: int, center_col: int):
-        """Draw a single alignment pattern (5x5)"""
-        # Alignment pattern structure:
-        # ■ ■ ■ ■ ■
-        # ■ □ □ □ ■
-        # ■ □ ■ □ ■
-        # ■ □ □ □ ■
-        # ■ ■ ■ ■ ■
-
-        pattern = [
-            [True,  True,  True,  True,  True],
-            [True,  False, False, False, True],
-            [True,  False, True,  False, True],
-            [True,  False, False, False, True],
-            [True,  True,  True,  True,  True]
-        ]
-
-        for i in range(5):
-            for j in range(5):
-                r, c = center_row + i - 2, center_col + j - 2
-                if 0 <= r < self.size and 0 <= c < self.size:
-                    self.matrix[r][c] = pattern[i][j]
-
-    def _place_dark_module(self):
-        """Place the dark module"""
-        self.matrix[self.size - 8][8] = True
-
-    def _reserve_format_areas(self):
-        """Reserve areas for format information"""
-        # These will be filled later with format and version information
-        # Horizontal format area (row 8)
-        for col in range(self.size):
-            if col < 9 or col >= self.size - 8:
-                if self.matrix[8][col] is None:
-                    self.matrix[8][col] = None  # Reserve for format info
-
-        # Vertical format area (column 8)
-        for row in range(self.size):
-            if row < 9 or row >= self.size - 8:
-                if self.matrix[row][8] is None:
-                    self.matrix[row][8] = None  # Reserve for format info
-
-    def place_data(self, data_bits: List[bool]):
+    def place_data(self, data_bits: np.ndarray):
         """Place data bits using the correct QR code data placement algorithm"""
-        bit_index = 0
-        total_bits = len(data_bits)
-
-        # QR code standard data placement algorithm
-        # Process columns from right to left, starting from column size-1
-        # For each column, zigzag: up for even columns, down for odd columns
-
-        for col in range(self.size - 1, -1, -1):
-            # Skip timing column
-            if col == 6:
-                continue
-
-            # Determine direction: alternate based on column parity
-            if col % 2 == (self.size - 1) % 2:
-                # Up direction: bottom to top
-                row_range = range(self.size - 1, -1, -1)
-            else:
-                # Down direction: top to bottom
-                row_range = range(self.size)
-
-            # Place data in this column
-            for row in row_range:
-                # Skip timing row
-                if row == 6:
-                    continue
+        idx = _placement_indices(self.version)
+        n = min(len(data_bits), len(idx))
 
-                # Place bit if this is a data cell
-                if self._is_data_cell(row, col):
-                    if bit_index < total_bits:
-                        self.matrix[row][col] = data_bits[bit_index]
-                        bit_index += 1
-                    else:
-                        # Pad with False
-                        self.matrix[row][col] = False
+        # Scatter the bits in zigzag order, pad the rest of the data area with False
+        self.matrix[idx[:n, 0], idx[:n, 1]] = np.asarray(data_bits[:n], dtype=np.uint8)
+        self.matrix[idx[n:, 0], idx[n:, 1]] = 0
 
         # Fill any remaining cells
         self._fill_remaining()
 
     def _is_data_cell(self, row: int, col: int) -> bool:
         """Check if a cell is part of the data area"""
-        # Finder patterns and separators
-        if row < 9 and col < 9:  # Top-left
-            return False
-        if row < 9 and col >= self.size - 8:  # Top-right
-            return False
-        if row >= self.size - 8 and col < 9:  # Bottom-left
-            return False
-
-        # Timing patterns
-        if row == 6 or col == 6:
-            return False
-
-        # Dark module
-        if row == self.size - 8 and col == 8:
-            return False
-
-        # Alignment patterns
-        positions = ALIGNMENT_PATTERN_POSITIONS.get(self.version, [])
-        for center_row in positions:
-            for center_col in positions:
-                if abs(row - center_row) <= 2 and abs(col - center_col) <= 2:
-                    return False
-
-        # Format areas (will be filled separately)
-        if row == 8 or col == 8:
-            return False
-
-        return True
+        return bool(_data_cell_mask(self.version)[row, col])
+
+    def finalize_data(self, data_bits: np.ndarray, mask_pattern: int):
+        """Place data bits and apply a mask pattern in a single scatter
+
+        Equivalent to place_data() followed by apply_mask(): the placement
+        indices cover exactly the data cells, so the mask is XORed into the
+        bits before they are written.
+        """
+        idx = _placement_indices(self.version)
+        n = min(len(data_bits), len(idx))
+        bits = np.zeros(len(idx), dtype=np.uint8)
+        bits[:n] = data_bits[:n]
+        bits ^= _mask_bitmap(self.size, mask_pattern)[idx[:, 0], idx[:, 1]]
+        self.matrix[idx[:, 0], idx[:, 1]] = bits
 
     def _fill_remaining(self):
-        """Fill any remaining None cells"""
-        for row in range(self.size):
-            for col in range(self.size):
-                if self.matrix[row][col] is None:
-                    self.matrix[row][col] = False
+        """Fill any remaining unset cells (no-op: the matrix starts zeroed)"""
 
     def apply_mask(self, mask_pattern: int):
         """Apply data masking pattern"""
-        for row in range(self.size):
-            for col in range(self.size):
-                if self._is_data_cell(row, col):
-                    if self._should_mask(row, col, mask_pattern):
-                        self.matrix[row][col] = not self.matrix[row][col]
+        self.matrix ^= _mask_bitmap(self.size, mask_pattern) & _data_cell_mask(self.version)
 
     def _should_mask(self, row: int, col: int, mask_pattern: int) -> bool:
         """Determine if a cell should be masked"""
-        if mask_pattern == 0:
-            return (row + col) % 2 == 0
-        elif mask_pattern == 1:
-            return row % 2 == 0
-        elif mask_pattern == 2:
-            return col % 3 == 0
-        elif mask_pattern == 3:
-            return (row + col) % 3 == 0
-        elif mask_pattern == 4:
-            return (row // 2 + col // 3) % 2 == 0
-        elif mask_pattern == 5:
-            return ((row * col) % 2 + (row * col) % 3) == 0
-        elif mask_pattern == 6:
-            return ((row * col) % 2 + (row * col) % 3) % 2 == 0
-        elif mask_pattern == 7:
-            return ((row + col) % 2 + (row * col) % 3) % 2 == 0
+        if 0 <= mask_pattern < len(_MASK_FUNCTIONS):
+            return _MASK_FUNCTIONS[mask_pattern](row, col)
         return False
 
     def add_format_info(self, format_bits: int):
@@ -888,8 +1033,8 @@ class QRMatrix:
                 # Skip dark module position (bottom-right of top-left finder)
                 if col == 8 and 8 == self.size - 8:
                     continue
-                bit_value = bool((format_bits >> (14 - i)) & 1)
-                self.matrix[8][col] = bit_value
+                bit_value = (format_bits >> (14 - i)) & 1
+                self.matrix[8, col] = bit_value
 
         # Vertical format information (column 8)
         vertical_positions = []
@@ -908,8 +1053,8 @@ class QRMatrix:
                 # Skip dark module position
                 if row == self.size - 8 and 8 == 8:
                     continue
-                bit_value = bool((format_bits >> (14 - i)) & 1)
-                self.matrix[row][8] = bit_value
+                bit_value = (format_bits >> (14 - i)) & 1
+                self.matrix[row, 8] = bit_value
 
     def add_version_info(self, version_bits: int):
         """Add version information for versions 7-40"""
@@ -924,7 +1069,7 @@ class QRMatrix:
                 row = i
                 col = self.size - 11 + j
                 if bit_pos < 18:
-                    self.matrix[row][col] = bool((version_bits >> (17 - bit_pos)) & 1)
+                    self.matrix[row, col] = (version_bits >> (17 - bit_pos)) & 1
                     bit_pos += 1
 
         # Bottom-left area
@@ -934,71 +1079,96 @@ class QRMatrix:
                 row = self.size - 11 + i
                 col = j
                 if bit_pos < 18:
-                    self.matrix[row][col] = bool((version_bits >> (17 - bit_pos)) & 1)
+                    self.matrix[row, col] = (version_bits >> (17 - bit_pos)) & 1
                     bit_pos += 1
 
-    def calculate_penalty_score(self) -> int:
-        """Calculate penalty score for mask pattern evaluation"""
-        score = 0
-        size = self.size
-
-        # Rule 1: Adjacent modules in row/column with same color
-        for row in range(size):
-            run_length = 1
-            for col in range(1, size):
-                if self.matrix[row][col] == self.matrix[row][col - 1]:
-                    run_length += 1
-                else:
-                    if run_length >= 5:
-                        score += run_length - 2
-                    run_length = 1
-            if run_length >= 5:
-                score += run_length - 2
-
-        for col in range(size):
-            run_length = 1
-            for row in range(1, size):
-                if self.matrix[row][col] == self.matrix[row - 1][col]:
-                    run_length += 1
-                else:
-                    if run_length >= 5:
-                        score += run_length - 2
-                    run_length = 1
-            if run_length >= 5:
-                score += run_length - 2
-
-        # Rule 2: 2x2 blocks of same color
-        for row in range(size - 1):
-            for col in range(size - 1):
-                if (self.matrix[row][col] == self.matrix[row][col + 1] ==
-                    self.matrix[row + 1][col] == self.matrix[row + 1][col + 1]):
-                    score += 3
+    def calculate_penalty_score(self, limit: float = float('inf')) -> int:
+        """Calculate penalty score for mask pattern evaluation
 
-        # Rule 3: Specific patterns (finder-like)
-        pattern1 = [True, False, True, True, True, False, True, False, False, False, False]
-        pattern2 = [False, False, False, False, True, False, True, True, True, False, True]
+        Rules are applied cheapest first. Once the running score reaches
+        `limit` the remaining rules are skipped and that partial score
+        (already >= limit) is returned. With numba all rules are scored in
+        one fused kernel and the full score is returned.
+        """
+        if NUMBA_AVAILABLE:
+            return _penalty_score(self.matrix)
 
-        for row in range(size):
-            for col in range(size - len(pattern1) + 1):
-                row_slice = [self.matrix[row][col + i] for i in range(len(pattern1))]
-                if row_slice == pattern1 or row_slice == pattern2:
-                    score += 40
+        m = self.matrix
+        size = self.size
+        score = 0
 
-        for col in range(size):
-            for row in range(size - len(pattern1) + 1):
-                col_slice = [self.matrix[row + i][col] for i in range(len(pattern1))]
-                if col_slice == pattern1 or col_slice == pattern2:
-                    score += 40
+        # Rows as one bitset: rules 4, 2 and 1 work on this single integer
+        packed = _pack_rows(m)
 
         # Rule 4: Balance of black and white modules
-        black_count = sum(sum(1 for cell in row if cell) for row in self.matrix)
+        black_count = _popcount(packed)
         total_count = size * size
         percentage = (black_count * 100) // total_count
         deviation = abs(percentage - 50)
         score += (deviation // 5) * 10
+        if score >= limit:
+            return score
+
+        # Rule 2: 2x2 blocks of same color
+        # Bit (r, c) of `same_left` is set when the module equals its left
+        # neighbour; a block ends at (r, c) when that holds in rows r - 1 and
+        # r and the module also equals the one above it
+        row_stride = size + 1
+        same_left = ~(packed ^ (packed >> 1)) & _neighbour_pair_bits(size, size)
+        same_above = ~(packed ^ (packed >> row_stride))
+        score += 3 * _popcount(same_left & (same_left >> row_stride) & same_above)
+        if score >= limit:
+            return score
+
+        # Columns are scanned as rows of a contiguous transposed copy
+        mt = np.ascontiguousarray(m.T)
+
+        # Rule 1: Adjacent modules in row/column with same color
+        score += self._run_length_penalty(m, packed) + self._run_length_penalty(mt)
+        if score >= limit:
+            return score
+
+        # Rule 3: Specific patterns (finder-like)
+        score += 40 * (self._finder_like_count(m) + self._finder_like_count(mt))
 
         return score
 
+    @staticmethod
+    def _run_length_penalty(lines: np.ndarray, packed: Optional[int] = None) -> int:
+        """Sum run_length - 2 over every run of 5+ same-colored modules along rows
+
+        `packed` may pass in the _pack_rows bitset of `lines` if already built.
+        """
+        rows, cols = lines.shape
+        if packed is None:
+            packed = _pack_rows(lines)
+
+        # Bit set where a module equals its left neighbour in the same row;
+        # a run of L modules gives L - 1 consecutive set bits
+        same = ~(packed ^ (packed >> 1)) & _neighbour_pair_bits(rows, cols)
+
+        # Bit set where 4 neighbour pairs in a row agree (a 5-module window):
+        # a run of L >= 5 modules gives L - 4 bits, so the L - 2 penalty is
+        # that popcount plus 2 per run of set bits
+        long_windows = same & (same >> 1) & (same >> 2) & (same >> 3)
+        run_starts = long_windows & ~(long_windows << 1)
+        return _popcount(long_windows) + 2 * _popcount(run_starts)
+
+    @staticmethod
+    def _finder_like_count(lines: np.ndarray) -> int:
+        """Count 1:1:3:1:1 finder-like windows (with 4 light modules) along rows"""
+        count = lines.shape[1] - _FINDER_LIKE_WIDTH + 1
+        if count <= 0:
+            return 0
+
+        # Shift each 11-module window into one integer per start position
+        windows = np.zeros((lines.shape[0], count), dtype=np.uint16)
+        for k in range(_FINDER_LIKE_WIDTH):
+            windows = (windows << 1) | lines[:, k:k + count]
+
+        matches = (windows == _FINDER_LIKE_PATTERNS[0]) | (windows == _FINDER_LIKE_PATTERNS[1])
+        return int(matches.sum())
+
 
 # ========================================
 # CORE QR CODE GENERATOR
@@ -1041,16 +1211,10 @@ class QRCode:
         capacity_info = QR_CAPACITY_TABLE[self.version][ErrorCorrectionLevel.get_name(self.error_correction)]
         total_codewords = capacity_info['total_codewords']
         total_bits = total_codewords * 8
-        padded_data = DataEncoder.add_terminator_and_padding(encoded_data, total_bits)
+        padded_data, padded_bits = DataEncoder.add_terminator_and_padding(encoded_data, total_bits)
 
         # Convert to codewords (MSB first)
-        data_codewords = []
-        for i in range(0, len(padded_data), 8):
-            codeword = 0
-            for j in range(8):
-                if i + j < len(padded_data):
-                    codeword |= padded_data[i + j] << (7 - j)  # MSB first
-            data_codewords.append(codeword)
+        data_codewords = list(padded_data.to_bytes(padded_bits // 8, 'big'))
 
         # Calculate number of data codewords
         data_codewords_count = 0
@@ -1064,21 +1228,14 @@ class QRCode:
         interleaved = self._apply_error_correction_and_interleave(actual_data_codewords)
 
         # Convert back to bits (MSB first)
-        data_bits = []
-        for codeword in interleaved:
-            for i in range(7, -1, -1):  # MSB first
-                data_bits.append(bool((codeword >> i) & 1))
+        data_bits = np.unpackbits(np.array(interleaved, dtype=np.uint8))
 
         # Choose best mask pattern
         self.mask_pattern = self._choose_best_mask(data_bits)
 
-        # Create final matrix
+        # Create final matrix with the chosen mask pattern applied
         self.matrix = QRMatrix(self.version)
-        self.matrix.place_data(data_bits)
-        self.matrix._fill_remaining()
-
-        # Apply the chosen mask pattern
-        self.matrix.apply_mask(self.mask_pattern)
+        self.matrix.finalize_data(data_bits, self.mask_pattern)
 
         # Add format and version information
         format_bits = get_format_info(self.error_correction, self.mask_pattern)
@@ -1142,7 +1299,7 @@ class QRCode:
 
         return result
 
-    def _choose_best_mask(self, data_bits: List[bool]) -> int:
+    def _choose_best_mask(self, data_bits: np.ndarray) -> int:
         """Choose the best mask pattern by evaluating penalty scores"""
         best_mask = 0
         best_score = float('inf')
@@ -1150,8 +1307,7 @@ class QRCode:
         for mask_pattern in range(8):
             # Create test matrix with all patterns
             test_matrix = QRMatrix(self.version)
-            test_matrix.place_data(data_bits)
-            test_matrix.apply_mask(mask_pattern)
+            test_matrix.finalize_data(data_bits, mask_pattern)
 
             # For penalty calculation, we need to temporarily fill format areas
             # with the format information for this mask pattern
@@ -1163,11 +1319,8 @@ class QRCode:
                 version_bits = get_version_info(self.version)
                 test_matrix.add_version_info(version_bits)
 
-            # Fill any remaining None cells
-            test_matrix._fill_remaining()
-
-            # Calculate penalty
-            score = test_matrix.calculate_penalty_score()
+            # Calculate penalty, giving up once it cannot beat the best so far
+            score = test_matrix.calculate_penalty_score(best_score)
 
             if score < best_score:
                 best_score = score
@@ -1175,8 +1328,8 @@ class QRCode:
 
         return best_mask
 
-    def get_matrix(self) -> List[List[bool]]:
-        """Get the QR code matrix"""
+    def get_matrix(self) -> np.ndarray:
+        """Get the QR code matrix as a uint8 array (1 = dark module)"""
         if self.matrix is None:
             raise RuntimeError("QR code not generated")
         return self.matrix.matrix
@@ -1198,38 +1351,26 @@ class QRCode:
         if self.matrix is None:
             raise RuntimeError("QR code not generated")
 
-        size = self.get_size()
-        img_size = (size + 2 * border) * scale
-
-        # Create image
-        img = Image.new('RGB', (img_size, img_size), background_color)
-        pixels = img.load()
+        # Palette indices: 0 = light module, 1 = dark module, 2 = border background
+        palette = np.array([light_color, dark_color, background_color], dtype=np.uint8)
+        codes = np.pad(self.matrix.matrix.astype(np.uint8), border, constant_values=2)
 
-        # Draw QR code
-        for img_y in range(img_size):
-            for img_x in range(img_size):
-                qr_x = (img_x // scale) - border
-                qr_y = (img_y // scale) - border
-
-                if 0 <= qr_x < size and 0 <= qr_y < size:
-                    if self.matrix.matrix[qr_y][qr_x]:
-                        pixels[img_x, img_y] = dark_color
-                    else:
-                        pixels[img_x, img_y] = light_color
-                # Background color is already set
+        # Scale every module up to a scale x scale block and map to RGB
+        pixels = np.kron(codes, np.ones((scale, scale), dtype=np.uint8))
+        img = Image.fromarray(palette[pixels])
 
         img.save(filename, 'PNG')
 
-
     def __str__(self) -> str:
         """String representation of the QR code"""
         if self.matrix is None:
             return "QR Code not generated"
 
-        lines = []
-        for row in self.matrix.matrix:
-            line = ''.join('██' if cell else '  ' for cell in row)
-            lines.append(line)
+        # Each row is read as raw bytes (0 or 1 per module) and expanded
+        # with str.translate, so no per-cell Python objects are created
+        cells = {0: '  ', 1: '██'}
+        lines = [row.tobytes().decode('latin-1').translate(cells)
+                 for row in self.matrix.matrix]
 
         return '\n'.join(lines)
 
@@ -1244,17 +1385,22 @@ class QRCode:
 
 def main():
     """Основная функция для интерактивного режима"""
-    print("╔══════════════════════════════════════════════════════════════╗")
-    print("║                    ГЕНЕРАТОР QR-КОДОВ                        ║")
-    print("║              QR Code Generator v1.0                          ║")
-    print("╚══════════════════════════════════════════════════════════════╝")
-    print()
+    # Каждый блок текста выводится одной записью в stdout
+    sys.stdout.write('\n'.join([
+        "╔══════════════════════════════════════════════════════════════╗",
+        "║                    ГЕНЕРАТОР QR-КОДОВ                        ║",
+        "║              QR Code Generator v1.0                          ║",
+        "╚══════════════════════════════════════════════════════════════╝",
+        "",
+    ]) + '\n')
 
     try:
         # Запрос ссылки или текста
-        print("ВВЕДИТЕ ССЫЛКУ ИЛИ ТЕКСТ ДЛЯ QR-КОДА:")
-        print("(например: https://example.com или просто текст)")
-        print()
+        sys.stdout.write('\n'.join([
+            "ВВЕДИТЕ ССЫЛКУ ИЛИ ТЕКСТ ДЛЯ QR-КОДА:",
+            "(например: https://example.com или просто текст)",
+            "",
+        ]) + '\n')
 
         data = input("> ").strip()
 
@@ -1263,34 +1409,39 @@ def main():
             return
 
         # Выбор уровня коррекции ошибок
-        print("\nВЫБЕРИТЕ УРОВЕНЬ КОРРЕКЦИИ ОШИБОК:")
-        print("1. L - Низкий (7%)    - для чистых условий")
-        print("2. M - Средний (15%)  - рекомендуется [по умолчанию]")
-        print("3. Q - Квартиль (25%) - для загрязненных условий")
-        print("4. H - Высокий (30%)  - максимальная надежность")
-        print()
+        sys.stdout.write('\n'.join([
+            "\nВЫБЕРИТЕ УРОВЕНЬ КОРРЕКЦИИ ОШИБОК:",
+            "1. L - Низкий (7%)    - для чистых условий",
+            "2. M - Средний (15%)  - рекомендуется [по умолчанию]",
+            "3. Q - Квартиль (25%) - для загрязненных условий",
+            "4. H - Высокий (30%)  - максимальная надежность",
+            "",
+        ]) + '\n')
 
         choice = input("Ваш выбор (1-4) [2]: ").strip()
         ecl_map = {'1': ErrorCorrectionLevel.L, '3': ErrorCorrectionLevel.Q, '4': ErrorCorrectionLevel.H}
         ecl = ecl_map.get(choice, ErrorCorrectionLevel.M)
 
-        print(f"\nГЕНЕРАЦИЯ QR-КОДА ДЛЯ: '{data}'")
-        print(f"УРОВЕНЬ КОРРЕКЦИИ: {ErrorCorrectionLevel.get_name(ecl)}")
+        sys.stdout.write('\n'.join([
+            f"\nГЕНЕРАЦИЯ QR-КОДА ДЛЯ: '{data}'",
+            f"УРОВЕНЬ КОРРЕКЦИИ: {ErrorCorrectionLevel.get_name(ecl)}",
+        ]) + '\n')
 
         # Генерация QR-кода
         qr = QRCode(data, ecl)
 
         # Отображение информации
-        print("\nQR-КОД УСПЕШНО СОЗДАН!")
-        print(f"Data: {qr.data}")
-        print(f"Version: {qr.version}")
-        print(f"Size: {qr.get_size()}x{qr.get_size()} modules")
-        print(f"Error Correction: {ErrorCorrectionLevel.get_name(qr.error_correction)}")
-        print(f"Mode: {EncodingMode.get_name(qr.mode)}")
-        print(f"Mask Pattern: {qr.mask_pattern}")
-
-        print("\nПРЕДВАРИТЕЛЬНЫЙ ПРОСМОТР:")
-        print(str(qr))
+        sys.stdout.write('\n'.join([
+            "\nQR-КОД УСПЕШНО СОЗДАН!",
+            f"Data: {qr.data}",
+            f"Version: {qr.version}",
+            f"Size: {qr.get_size()}x{qr.get_size()} modules",
+            f"Error Correction: {ErrorCorrectionLevel.get_name(qr.error_correction)}",
+            f"Mode: {EncodingMode.get_name(qr.mode)}",
+            f"Mask Pattern: {qr.mask_pattern}",
+            "\nПРЕДВАРИТЕЛЬНЫЙ ПРОСМОТР:",
+            str(qr),
+        ]) + '\n')
 
         # Сохранение файла
         print("\nСОХРАНЕНИЕ ФАЙЛА:")
@@ -1314,11 +1465,13 @@ def main():
         print(f"\nСОХРАНЕНИЕ В ФАЙЛ: {filename} (масштаб: {scale})")
         qr.save_png(filename, scale=scale, border=4)
 
-        print("\nГОТОВО!")
-        print(f"ФАЙЛ СОХРАНЕН: {filename}")
-        print(f"РАЗМЕР: {qr.get_size() * scale + 8}x{qr.get_size() * scale + 8} пикселей")
-        print("\nСОВЕТ: Попробуйте отсканировать QR-код смартфоном!")
-        print(f"ОН ДОЛЖЕН СОДЕРЖАТЬ: {data}")
+        sys.stdout.write('\n'.join([
+            "\nГОТОВО!",
+            f"ФАЙЛ СОХРАНЕН: {filename}",
+            f"РАЗМЕР: {qr.get_size() * scale + 8}x{qr.get_size() * scale + 8} пикселей",
+            "\nСОВЕТ: Попробуйте отсканировать QR-код смартфоном!",
+            f"ОН ДОЛЖЕН СОДЕРЖАТЬ: {data}",
+        ]) + '\n')
 
     except KeyboardInterrupt:
         print("\n\nОТМЕНЕНО ПОЛЬЗОВАТЕЛЕМ.")
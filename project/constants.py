@@ -2,9 +2,12 @@
 Constants for QR Code generation according to ISO/IEC 18004:2015
 """
 
+from collections import namedtuple
 from typing import Dict, List, Tuple
 from enum import Enum
 
+import numpy as np
+
 
 class ErrorCorrectionLevel(Enum):
     """Error correction levels for QR codes"""
@@ -62,24 +65,47 @@ QR_CAPACITY_TABLE = {
         'Q': {'numeric': 178, 'alphanumeric': 108, 'byte': 74, 'kanji': 45, 'total_codewords': 172, 'groups': [(4, 19, 24)]},
         'H': {'numeric': 139, 'alphanumeric': 84, 'byte': 58, 'kanji': 36, 'total_codewords': 172, 'groups': [(4, 15, 28)]}
     },
-    5: {
-        'L': {'numeric': 255, 'alphanumeric': 154, 'byte': 106, 'kanji': 65, 'total_codewords': 134, 'groups': [(1, 108, 26)]},
-        'M': {'numeric': 202, 'alphanumeric': 122, 'byte': 84, 'kanji': 52, 'total_codewords': 134, 'groups': [(2, 43, 22)]},
-        'Q': {'numeric': 144, 'alphanumeric': 87, 'byte': 60, 'kanji': 37, 'total_codewords': 134, 'groups': [(2, 15, 18), (2, 16, 26)]},
-        'H': {'numeric': 106, 'alphanumeric': 64, 'byte': 44, 'kanji': 27, 'total_codewords': 134, 'groups': [(2, 11, 24), (2, 12, 28)]}
-    },
-    6: {
-        'L': {'numeric': 322, 'alphanumeric': 195, 'byte': 134, 'kanji': 82, 'total_codewords': 172, 'groups': [(2, 68, 18)]},
-        'M': {'numeric': 255, 'alphanumeric': 154, 'byte': 106, 'kanji': 65, 'total_codewords': 172, 'groups': [(4, 27, 16)]},
-        'Q': {'numeric': 178, 'alphanumeric': 108, 'byte': 74, 'kanji': 45, 'total_codewords': 172, 'groups': [(4, 19, 24)]},
-        'H': {'numeric': 139, 'alphanumeric': 84, 'byte': 58, 'kanji': 36, 'total_codewords': 172, 'groups': [(4, 15, 28)]}
-    },
     # Extended capacity table for versions 7-40 would go here
     # For brevity, including only versions 1-6 in this example
     # In a full implementation, all 40 versions should be included
 }
 
 
+# Flat, read-only view of QR_CAPACITY_TABLE: one record per (version, level)
+# stored at index (version - 1) * 4 + EC_IDX[level]
+QRCapInfo = namedtuple('QRCapInfo', 'numeric alphanumeric byte kanji total_codewords groups')
+
+EC_IDX = {
+    ErrorCorrectionLevel.L: 0,
+    ErrorCorrectionLevel.M: 1,
+    ErrorCorrectionLevel.Q: 2,
+    ErrorCorrectionLevel.H: 3,
+}
+
+_CAP = tuple(
+    QRCapInfo(**{**QR_CAPACITY_TABLE[version][ecl_name],
+                 'groups': tuple(QR_CAPACITY_TABLE[version][ecl_name]['groups'])})
+    for version in sorted(QR_CAPACITY_TABLE)
+    for ecl_name in 'LMQH'
+)
+
+MODE_IDX = {
+    EncodingMode.NUMERIC: 0,
+    EncodingMode.ALPHANUMERIC: 1,
+    EncodingMode.BYTE: 2,
+    EncodingMode.KANJI: 3,
+}
+
+# Character capacities as a dense array indexed [version - 1, EC_IDX, MODE_IDX];
+# every (level, mode) column grows with the version, so it can be binary-searched
+CAPACITY_ARRAY = np.array(
+    [[[info.numeric, info.alphanumeric, info.byte, info.kanji] for info in _CAP[i:i + 4]]
+     for i in range(0, len(_CAP), 4)],
+    dtype=np.int32,
+)
+CAPACITY_ARRAY.setflags(write=False)
+
+
 # Alignment pattern positions for each version
 ALIGNMENT_PATTERN_POSITIONS = {
     1: [],
@@ -125,6 +151,24 @@ ALIGNMENT_PATTERN_POSITIONS = {
 }
 
 
+def _alignment_pairs(version: int) -> np.ndarray:
+    """(row, col) centers of the alignment patterns drawn for a version"""
+    size = version * 4 + 17
+    positions = ALIGNMENT_PATTERN_POSITIONS[version]
+    finder_centers = [(3, 3), (size - 4, 3), (3, size - 4)]
+
+    # Skip centers that overlap a finder pattern
+    pairs = [(row, col) for row in positions for col in positions
+             if not any(abs(row - fr) <= 2 and abs(col - fc) <= 2 for fr, fc in finder_centers)]
+    pairs = np.array(pairs, dtype=np.int16).reshape(-1, 2)
+    pairs.setflags(write=False)
+    return pairs
+
+
+# Alignment pattern centers per version, precomputed from the positions above
+ALIGNMENT_PAIRS = {version: _alignment_pairs(version) for version in ALIGNMENT_PATTERN_POSITIONS}
+
+
 # Format information table (15 bits)
 # Index is (error_correction << 3) | mask_pattern
 FORMAT_INFO_TABLE = [
@@ -209,6 +253,15 @@ VERSION_INFO_TABLE = [
 ]
 
 
+# Index of each level's first entry in FORMAT_INFO_TABLE (8 masks per level)
+ErrorCorrectionLevel.L.fmt_base = 0   # L -> 0-7
+ErrorCorrectionLevel.M.fmt_base = 8   # M -> 8-15
+ErrorCorrectionLevel.Q.fmt_base = 16  # Q -> 16-23
+ErrorCorrectionLevel.H.fmt_base = 24  # H -> 24-31
+
+_FORMAT_INFO_TUPLE = tuple(FORMAT_INFO_TABLE)
+
+
 # Alphanumeric character set for QR codes
 ALPHANUMERIC_CHARS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:'
 
@@ -233,20 +286,29 @@ GENERATOR_POLYNOMIALS = {
 }
 
 
+# Data mask patterns 0-7, precomputed for the largest symbol (version 40).
+# Smaller versions use the top-left size x size corner.
+MAX_MATRIX_SIZE = 177
+_rows, _cols = np.indices((MAX_MATRIX_SIZE, MAX_MATRIX_SIZE))
+MASK_PATTERNS = np.stack([
+    (_rows + _cols) % 2 == 0,
+    _rows % 2 == 0,
+    _cols % 3 == 0,
+    (_rows + _cols) % 3 == 0,
+    (_rows // 2 + _cols // 3) % 2 == 0,
+    ((_rows * _cols) % 2 + (_rows * _cols) % 3) == 0,
+    ((_rows * _cols) % 2 + (_rows * _cols) % 3) % 2 == 0,
+    ((_rows + _cols) % 2 + (_rows * _cols) % 3) % 2 == 0,
+])
+MASK_PATTERNS.setflags(write=False)
+del _rows, _cols
+
+
 def get_format_info(error_correction: ErrorCorrectionLevel, mask_pattern: int) -> int:
     """Get format information bits for given error correction level and mask pattern"""
     # Use precomputed table for format information
     # This ensures correctness according to ISO/IEC 18004
-    ec_map = {
-        ErrorCorrectionLevel.L: 0,   # L -> 0-7
-        ErrorCorrectionLevel.M: 8,   # M -> 8-15
-        ErrorCorrectionLevel.Q: 16,  # Q -> 16-23
-        ErrorCorrectionLevel.H: 24   # H -> 24-31
-    }
-    index = ec_map[error_correction] + mask_pattern
-    if index >= len(FORMAT_INFO_TABLE):
-        raise ValueError(f"Invalid format info index: {index}")
-    return FORMAT_INFO_TABLE[index]
+    return _FORMAT_INFO_TUPLE[error_correction.fmt_base + mask_pattern]
 
 
 def get_version_info(version: int) -> int:
@@ -256,18 +318,21 @@ def get_version_info(version: int) -> int:
     return 0
 
 
-def get_capacity(version: int, error_correction: ErrorCorrectionLevel, mode: EncodingMode) -> int:
-    """Get maximum capacity for given parameters"""
+def get_capacity_info(version: int, error_correction: ErrorCorrectionLevel) -> QRCapInfo:
+    """Get capacity and block structure for given version and error correction level"""
     if version not in QR_CAPACITY_TABLE:
         raise ValueError(f"Version {version} not supported")
 
-    ecl_name = error_correction.name
-    mode_name = mode.name.lower()
+    return _CAP[(version - 1) * 4 + EC_IDX[error_correction]]
 
-    if ecl_name not in QR_CAPACITY_TABLE[version]:
-        raise ValueError(f"Error correction level {ecl_name} not supported for version {version}")
 
-    if mode_name not in QR_CAPACITY_TABLE[version][ecl_name]:
-        raise ValueError(f"Mode {mode_name} not supported for version {version} with ECL {ecl_name}")
+def get_capacity(version: int, error_correction: ErrorCorrectionLevel, mode: EncodingMode) -> int:
+    """Get maximum capacity for given parameters"""
+    capacity_info = get_capacity_info(version, error_correction)
+    mode_name = mode.name.lower()
+
+    if mode_name not in QRCapInfo._fields:
+        raise ValueError(f"Mode {mode_name} not supported for version {version} "
+                         f"with ECL {error_correction.name}")
 
-    return QR_CAPACITY_TABLE[version][ecl_name][mode_name]
+    return getattr(capacity_info, mode_name)
@@ -2,14 +2,51 @@
 Core QR code generation functionality
 """
 
+import struct
+import zlib
+from xml.sax.saxutils import quoteattr
 from typing import List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from PIL import Image as _PIL_Image
+except ImportError:
+    _PIL_Image = None
+
 from .constants import (
-    ErrorCorrectionLevel, EncodingMode, QR_CAPACITY_TABLE,
-    get_format_info, get_version_info
+    ErrorCorrectionLevel, EncodingMode, CAPACITY_ARRAY, EC_IDX, MASK_PATTERNS, MODE_IDX,
+    get_capacity_info, get_format_info, get_version_info
 )
 from .encoder import DataEncoder
 from .error_correction import ReedSolomonEncoder
-from .matrix import QRMatrix
+from .matrix import NUMBA_AVAILABLE, QRMatrix, _data_cell_mask, score_mask
+
+
+# (dark, light, background) colors that save_png can write as a 1-bit PNG
+_BLACK_ON_WHITE = ((0, 0, 0), (255, 255, 255), (255, 255, 255))
+
+
+def _png_chunk(chunk_type: bytes, data: bytes) -> bytes:
+    """Length-prefixed, CRC-suffixed PNG chunk"""
+    body = chunk_type + data
+    return struct.pack('>I', len(data)) + body + struct.pack('>I', zlib.crc32(body))
+
+
+def _write_monochrome_png(filename: str, white: np.ndarray):
+    """Write a boolean pixel array (True = white) as a 1-bit grayscale PNG"""
+    height, width = white.shape
+
+    # Each scanline: filter type 0 followed by the row packed 8 pixels per byte
+    rows = np.packbits(white, axis=1)
+    scanlines = np.hstack([np.zeros((height, 1), dtype=np.uint8), rows])
+
+    ihdr = struct.pack('>IIBBBBB', width, height, 1, 0, 0, 0, 0)
+    with open(filename, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(_png_chunk(b'IHDR', ihdr))
+        f.write(_png_chunk(b'IDAT', zlib.compress(scanlines.tobytes(), 9)))
+        f.write(_png_chunk(b'IEND', b''))
 
 
 class QRCode:
@@ -18,25 +55,21 @@ class QRCode:
     def __init__(self, data: str, error_correction: ErrorCorrectionLevel = ErrorCorrectionLevel.M):
         self.data = data
         self.error_correction = error_correction
-        self.version = self._determine_version()
         self.mode = DataEncoder.detect_mode(data)
+        self.version = self._determine_version(self.mode)
         self.mask_pattern = 0
         self.matrix: Optional[QRMatrix] = None
 
         # Generate the QR code
         self._generate()
 
-    def _determine_version(self) -> int:
-        """Determine the minimum QR version needed for the data"""
-        mode = DataEncoder.detect_mode(self.data)
-        ecl_name = self.error_correction.name
-
-        for version in range(1, 7):  # Support versions 1-6 for now
-            if version in QR_CAPACITY_TABLE:
-                capacity_info = QR_CAPACITY_TABLE[version].get(ecl_name, {})
-                capacity = capacity_info.get(mode.name.lower(), 0)
-                if len(self.data) <= capacity:
-                    return version
+    def _determine_version(self, mode: EncodingMode) -> int:
+        """Determine the minimum QR version needed for the data in the given mode"""
+        # Smallest version whose capacity for this level and mode fits the data
+        capacities = CAPACITY_ARRAY[:, EC_IDX[self.error_correction], MODE_IDX[mode]]
+        version = int(np.searchsorted(capacities, len(self.data))) + 1
+        if version <= len(capacities):
+            return version
 
         raise ValueError(f"Data too long for supported versions (max ~1000 chars)")
 
@@ -46,23 +79,17 @@ class QRCode:
         encoded_data = DataEncoder.encode(self.data, self.mode, self.version)
 
         # Add terminator and padding
-        capacity_info = QR_CAPACITY_TABLE[self.version][self.error_correction.name]
-        total_codewords = capacity_info['total_codewords']
+        capacity_info = get_capacity_info(self.version, self.error_correction)
+        total_codewords = capacity_info.total_codewords
         total_bits = total_codewords * 8
-        padded_data = DataEncoder.add_terminator_and_padding(encoded_data, total_bits)
+        padded_data, padded_bits = DataEncoder.add_terminator_and_padding(encoded_data, total_bits)
 
         # Convert to codewords (MSB first)
-        data_codewords = []
-        for i in range(0, len(padded_data), 8):
-            codeword = 0
-            for j in range(8):
-                if i + j < len(padded_data):
-                    codeword |= padded_data[i + j] << (7 - j)  # MSB first
-            data_codewords.append(codeword)
+        data_codewords = list(padded_data.to_bytes((padded_bits + 7) // 8, 'big'))
 
         # Calculate number of data codewords
         data_codewords_count = 0
-        for num_blocks, data_words, ecc_words in capacity_info['groups']:
+        for num_blocks, data_words, ecc_words in capacity_info.groups:
             data_codewords_count += num_blocks * data_words
 
         # Take only data codewords (exclude padding that will be replaced by ECC)
@@ -72,20 +99,10 @@ class QRCode:
         interleaved = self._apply_error_correction_and_interleave(actual_data_codewords)
 
         # Convert back to bits (MSB first)
-        data_bits = []
-        for codeword in interleaved:
-            for i in range(7, -1, -1):  # MSB first
-                data_bits.append(bool((codeword >> i) & 1))
-
-        # Choose best mask pattern
-        self.mask_pattern = self._choose_best_mask(data_bits)
+        data_bits = np.unpackbits(np.asarray(interleaved, dtype=np.uint8)).astype(bool)
 
-        # Create final matrix
-        self.matrix = QRMatrix(self.version)
-        self.matrix.place_data(data_bits)
-
-        # Apply the chosen mask pattern
-        self.matrix.apply_mask(self.mask_pattern)
+        # Choose best mask pattern (the winning matrix is already masked)
+        self.mask_pattern, self.matrix = self._choose_best_mask(data_bits)
 
         # Add format and version information
         format_bits = get_format_info(self.error_correction, self.mask_pattern)
@@ -97,10 +114,8 @@ class QRCode:
 
     def _apply_error_correction_and_interleave(self, data_codewords: List[int]) -> List[int]:
         """Apply error correction and interleave data and ECC codewords"""
-        capacity_info = QR_CAPACITY_TABLE[self.version][self.error_correction.name]
-        groups = capacity_info['groups']
+        groups = get_capacity_info(self.version, self.error_correction).groups
 
-        rs_encoder = ReedSolomonEncoder()
         data_blocks = []
         ecc_blocks = []
 
@@ -118,58 +133,69 @@ class QRCode:
                         block_data.append(0)  # Pad with zeros if needed
 
                 # Generate ECC for this block
-                block_ecc = rs_encoder.encode(block_data, ecc_words)
+                block_ecc = ReedSolomonEncoder.encode(block_data, ecc_words)
 
                 data_blocks.append(block_data)
                 ecc_blocks.append(block_ecc)
 
-        # For version 1, no interleaving needed - just concatenate data + ECC
-        if self.version == 1:
-            result = []
-            if data_blocks:
-                result.extend(data_blocks[0])  # First (and only) data block
-            if ecc_blocks:
-                result.extend(ecc_blocks[0])  # First (and only) ECC block
-            return result
-
-        # Interleave data blocks (take one codeword from each block in round-robin)
-        result = []
-        max_data_len = max(len(block) for block in data_blocks) if data_blocks else 0
-        for i in range(max_data_len):
-            for block in data_blocks:
-                if i < len(block):
-                    result.append(block[i])
-
-        # Interleave ECC blocks
-        max_ecc_len = max(len(block) for block in ecc_blocks) if ecc_blocks else 0
-        for i in range(max_ecc_len):
-            for block in ecc_blocks:
-                if i < len(block):
-                    result.append(block[i])
-
-        return result
-
-    def _choose_best_mask(self, data_bits: List[bool]) -> int:
-        """Choose the best mask pattern by evaluating penalty scores"""
+        # Interleave data blocks, then ECC blocks (one codeword from each block in round-robin)
+        result = np.concatenate([self._interleave(data_blocks), self._interleave(ecc_blocks)])
+        return result.tolist()
+
+    @staticmethod
+    def _interleave(blocks: List[List[int]]) -> np.ndarray:
+        """Take one codeword from each block in turn until all blocks are exhausted"""
+        lengths = [len(block) for block in blocks]
+        if len(set(lengths)) <= 1:
+            return np.asarray(blocks, dtype=np.uint8).T.ravel()
+
+        # Uneven blocks: pad the short ones with -1 and drop the padding afterwards
+        padded = np.full((len(blocks), max(lengths)), -1, dtype=np.int16)
+        for row, block in zip(padded, blocks):
+            row[:len(block)] = block
+        flat = padded.T.ravel()
+        return flat[flat >= 0].astype(np.uint8)
+
+    def _choose_best_mask(self, data_bits: np.ndarray) -> Tuple[int, QRMatrix]:
+        """Choose the best mask pattern by evaluating penalty scores
+
+        Returns the mask pattern together with the matrix it was applied to.
+        """
+        # Data placement does not depend on the mask, so do it only once
+        base_matrix = QRMatrix(self.version)
+        base_matrix.place_data(data_bits)
+
+        if NUMBA_AVAILABLE:
+            # Score all eight masks in the compiled kernel, then mask only the winner
+            size = base_matrix.size
+            modules = base_matrix.matrix.view(np.uint8)
+            data_cells = _data_cell_mask(self.version).view(np.uint8)
+            scores = [score_mask(modules, data_cells, MASK_PATTERNS[mask_pattern, :size, :size].view(np.uint8))
+                      for mask_pattern in range(8)]
+            best_mask = int(np.argmin(scores))
+            best_matrix = base_matrix.copy()
+            best_matrix.apply_mask(best_mask)
+            return best_mask, best_matrix
+
         best_mask = 0
+        best_matrix = None
         best_score = float('inf')
 
         for mask_pattern in range(8):
-            # Create test matrix
-            test_matrix = QRMatrix(self.version)
-            test_matrix.place_data(data_bits)
+            test_matrix = base_matrix.copy()
             test_matrix.apply_mask(mask_pattern)
 
-            # Calculate penalty
-            score = test_matrix.calculate_penalty_score()
+            # Calculate penalty, giving up once it cannot beat the best so far
+            score = test_matrix.calculate_penalty_score(best_score)
 
             if score < best_score:
                 best_score = score
                 best_mask = mask_pattern
+                best_matrix = test_matrix
 
-        return best_mask
+        return best_mask, best_matrix
 
-    def get_matrix(self) -> List[List[bool]]:
+    def get_matrix(self) -> np.ndarray:
         """Get the QR code matrix"""
         if self.matrix is None:
             raise RuntimeError("QR code not generated")
@@ -184,67 +210,95 @@ class QRCode:
                  light_color: Tuple[int, int, int] = (255, 255, 255),
                  background_color: Tuple[int, int, int] = (255, 255, 255)):
         """Save QR code as PNG image"""
-        try:
-            from PIL import Image
-        except ImportError:
-            raise ImportError("Pillow is required for PNG output. Install with: pip install Pillow")
-
         if self.matrix is None:
             raise RuntimeError("QR code not generated")
 
         size = self.get_size()
         img_size = (size + 2 * border) * scale
 
-        # Create image
-        img = Image.new('RGB', (img_size, img_size), background_color)
-        pixels = img.load()
+        # Palette index of every pixel: background everywhere, then the
+        # modules (0 or 1 each) upscaled into the center -- no per-pixel branches
+        indices = np.full((img_size, img_size), 2, dtype=np.uint8)
+        offset = border * scale
+        indices[offset:offset + size * scale, offset:offset + size * scale] = np.kron(
+            self.matrix.matrix.astype(np.uint8), np.ones((scale, scale), dtype=np.uint8))
 
-        # Draw QR code
-        for img_y in range(img_size):
-            for img_x in range(img_size):
-                qr_x = (img_x // scale) - border
-                qr_y = (img_y // scale) - border
+        # Plain black on white fits a 1-bit grayscale PNG, written directly
+        if (tuple(dark_color), tuple(light_color), tuple(background_color)) == _BLACK_ON_WHITE:
+            _write_monochrome_png(filename, indices != 1)
+            return
 
-                if 0 <= qr_x < size and 0 <= qr_y < size:
-                    if self.matrix.matrix[qr_y][qr_x]:
-                        pixels[img_x, img_y] = dark_color
-                    else:
-                        pixels[img_x, img_y] = light_color
-                # Background color is already set
+        if _PIL_Image is None:
+            raise ImportError("Pillow is required for PNG output. Install with: pip install Pillow")
+
+        # Three-color palette: 0 = light, 1 = dark, 2 = background
+        palette = [*light_color, *dark_color, *background_color]
 
-        img.save(filename, 'PNG')
+        img = _PIL_Image.frombytes('P', (img_size, img_size), indices.tobytes())
+        img.putpalette(palette)
+
+        img.save(filename, 'PNG', optimize=True)
+
+    def _dark_rects(self) -> List[Tuple[int, int, int, int]]:
+        """Cover the dark modules with (x, y, width, height) rectangles.
+
+        Consecutive dark modules in a row are merged into one run, and runs
+        with the same span in consecutive rows are stacked into one rectangle.
+        """
+        size = self.get_size()
+        padded = np.zeros((size, size + 2), dtype=np.int8)
+        padded[:, 1:-1] = self.matrix.matrix
+        edges = np.diff(padded, axis=1)
+
+        rects = []
+        open_rects = {}  # (x, width) -> index of the rectangle ending on the previous row
+        for y in range(size):
+            starts = np.flatnonzero(edges[y] == 1).tolist()
+            ends = np.flatnonzero(edges[y] == -1).tolist()
+            current = {}
+            for start, end in zip(starts, ends):
+                span = (start, end - start)
+                index = open_rects.get(span)
+                if index is None:
+                    index = len(rects)
+                    rects.append([start, y, end - start, 0])
+                rects[index][3] += 1
+                current[span] = index
+            open_rects = current
+
+        return [tuple(rect) for rect in rects]
 
     def save_svg(self, filename: str, scale: int = 10, border: int = 4,
                  dark_color: str = 'black', light_color: str = 'white'):
         """Save QR code as SVG image"""
-        try:
-            import svgwrite
-        except ImportError:
-            raise ImportError("svgwrite is required for SVG output. Install with: pip install svgwrite")
-
         if self.matrix is None:
             raise RuntimeError("QR code not generated")
 
         size = self.get_size()
         img_size = (size + 2 * border) * scale
-
-        # Create SVG
-        dwg = svgwrite.Drawing(filename, size=(img_size, img_size))
-
-        # Background
-        dwg.add(dwg.rect(insert=(0, 0), size=(img_size, img_size), fill=light_color))
-
-        # Draw modules
-        for y in range(size):
-            for x in range(size):
-                if self.matrix.matrix[y][x]:
-                    dwg.add(dwg.rect(
-                        insert=((x + border) * scale, (y + border) * scale),
-                        size=(scale, scale),
-                        fill=dark_color
-                    ))
-
-        dwg.save()
+        # Colors are user strings: quote and escape them for the XML attributes
+        light_fill = quoteattr(str(light_color))
+        dark_fill = quoteattr(str(dark_color))
+
+        parts = [
+            '<?xml version="1.0" encoding="utf-8" ?>\n',
+            f'<svg xmlns="http://www.w3.org/2000/svg" version="1.1" '
+            f'width="{img_size}" height="{img_size}">\n',
+            # Background
+            f'<rect x="0" y="0" width="{img_size}" height="{img_size}" fill={light_fill} />\n',
+        ]
+
+        # Draw modules, one rectangle per merged block
+        for x, y, width, height in self._dark_rects():
+            parts.append(
+                f'<rect x="{(x + border) * scale}" y="{(y + border) * scale}" '
+                f'width="{width * scale}" height="{height * scale}" fill={dark_fill} />\n'
+            )
+
+        parts.append('</svg>\n')
+
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(''.join(parts))
 
     def save_eps(self, filename: str, scale: int = 10, border: int = 4):
         """Save QR code as EPS image"""
@@ -254,28 +308,28 @@ class QRCode:
         size = self.get_size()
         img_size = (size + 2 * border) * scale
 
-        with open(filename, 'w') as f:
+        parts = [
             # EPS header
-            f.write("%!PS-Adobe-3.0 EPSF-3.0\n")
-            f.write(f"%%BoundingBox: 0 0 {img_size} {img_size}\n")
-            f.write("%%EndComments\n")
-            f.write("/pixel { rectfill } def\n")
-
+            "%!PS-Adobe-3.0 EPSF-3.0\n",
+            f"%%BoundingBox: 0 0 {img_size} {img_size}\n",
+            "%%EndComments\n",
+            "/pixel { rectfill } def\n",
             # Draw background
-            f.write(f"0 0 {img_size} {img_size} rectfill\n")
-
+            f"0 0 {img_size} {img_size} rectfill\n",
             # Set black color for modules
-            f.write("0 0 0 setrgbcolor\n")
+            "0 0 0 setrgbcolor\n",
+        ]
 
-            # Draw black modules
-            for y in range(size):
-                for x in range(size):
-                    if self.matrix.matrix[y][x]:
-                        px = (x + border) * scale
-                        py = img_size - (y + border + 1) * scale  # Flip Y coordinate
-                        f.write(f"{px} {py} {scale} {scale} rectfill\n")
+        # Draw black modules, one rectfill per merged block
+        for x, y, width, height in self._dark_rects():
+            px = (x + border) * scale
+            py = img_size - (y + height + border) * scale  # Flip Y coordinate
+            parts.append(f"{px} {py} {width * scale} {height * scale} rectfill\n")
 
-            f.write("%%EOF\n")
+        parts.append("%%EOF\n")
+
+        with open(filename, 'w') as f:
+            f.write(''.join(parts))
 
     def __str__(self) -> str:
         """String representation of the QR code"""
@@ -283,8 +337,13 @@ class QRCode:
             return "QR Code not generated"
 
         lines = []
-        for row in self.matrix.matrix:
+        for row in self.matrix.matrix.tolist():
             line = ''.join('██' if cell else '  ' for cell in row)
             lines.append(line)
 
         return '\n'.join(lines)
+
+
+def generate_qr(data: str, error_correction: ErrorCorrectionLevel = ErrorCorrectionLevel.M) -> np.ndarray:
+    """Encode data in one call and return the module matrix as uint8 (1 = dark)"""
+    return QRCode(data, error_correction).get_matrix().view(np.uint8)
@@ -2,10 +2,25 @@
 Data encoding module for QR codes
 """
 
-from typing import List
+from functools import lru_cache
+from typing import List, Tuple
 from .constants import EncodingMode, ALPHANUMERIC_CHARS
 
 
+# Alphanumeric value of every byte, for bytes.translate; 0xFF marks bytes
+# that are not in the alphanumeric set
+_ALPHANUMERIC_LUT = bytearray(b'\xff' * 256)
+for _value, _char in enumerate(ALPHANUMERIC_CHARS):
+    _ALPHANUMERIC_LUT[ord(_char)] = _value
+_ALPHANUMERIC_LUT = bytes(_ALPHANUMERIC_LUT)
+
+
+@lru_cache(maxsize=None)
+def _padding_value(pad_bytes: int) -> int:
+    """Alternating 0xEC 0x11 pad codewords, pad_bytes of them, as one integer"""
+    return int.from_bytes((b'\xec\x11' * ((pad_bytes + 1) // 2))[:pad_bytes], 'big')
+
+
 class DataEncoder:
     """Encodes data into QR code format"""
 
@@ -22,6 +37,8 @@ class DataEncoder:
     @staticmethod
     def _is_alphanumeric(data: str) -> bool:
         """Check if data can be encoded in alphanumeric mode"""
+        if data.isascii():
+            return 0xFF not in data.upper().encode('ascii').translate(_ALPHANUMERIC_LUT)
         return all(c.upper() in ALPHANUMERIC_CHARS for c in data)
 
     @staticmethod
@@ -62,9 +79,9 @@ class DataEncoder:
         return counts[mode]
 
     @staticmethod
-    def encode_numeric(data: str) -> List[int]:
-        """Encode numeric data"""
-        bits = []
+    def encode_numeric(data: str) -> Tuple[int, int]:
+        """Encode numeric data, returns (bit buffer, bit count)"""
+        buf, nbits = 0, 0
 
         # Process in groups of 3 digits
         for i in range(0, len(data), 3):
@@ -78,111 +95,103 @@ class DataEncoder:
             else:  # 1 digit
                 bit_count = 4
 
-            # Convert to binary (MSB first)
-            for j in range(bit_count - 1, -1, -1):
-                bits.append((value >> j) & 1)
+            buf = (buf << bit_count) | value
+            nbits += bit_count
 
-        return bits
+        return buf, nbits
 
     @staticmethod
-    def encode_alphanumeric(data: str) -> List[int]:
-        """Encode alphanumeric data"""
-        bits = []
+    def encode_alphanumeric(data: str) -> Tuple[int, int]:
+        """Encode alphanumeric data, returns (bit buffer, bit count)"""
+        buf, nbits = 0, 0
         data = data.upper()
 
-        # Character to value mapping
-        char_values = {char: i for i, char in enumerate(ALPHANUMERIC_CHARS)}
+        # One value byte per character ('replace' keeps non-ASCII characters
+        # one byte long, so an index into values is an index into data)
+        values = data.encode('ascii', 'replace').translate(_ALPHANUMERIC_LUT)
+        if 0xFF in values:
+            raise KeyError(data[values.index(0xFF)])
 
         # Process in pairs
-        for i in range(0, len(data), 2):
-            if i + 1 < len(data):
-                # Two characters
-                val1 = char_values[data[i]]
-                val2 = char_values[data[i + 1]]
-                value = val1 * 45 + val2
-                bit_count = 11
-            else:
-                # Single character
-                value = char_values[data[i]]
-                bit_count = 6
-
-            # Convert to binary (MSB first)
-            for j in range(bit_count - 1, -1, -1):
-                bits.append((value >> j) & 1)
-
-        return bits
+        for i in range(0, len(values) - 1, 2):
+            # Two characters
+            buf = (buf << 11) | (values[i] * 45 + values[i + 1])
+            nbits += 11
 
-    @staticmethod
-    def encode_byte(data: str) -> List[int]:
-        """Encode byte data (UTF-8)"""
-        bits = []
+        if len(values) % 2:
+            # Single trailing character
+            buf = (buf << 6) | values[-1]
+            nbits += 6
 
-        # Encode as UTF-8 bytes
-        for char in data:
-            byte_value = ord(char)
-            # Convert byte to 8 bits (MSB first)
-            for j in range(7, -1, -1):
-                bits.append((byte_value >> j) & 1)
+        return buf, nbits
 
-        return bits
+    @staticmethod
+    def encode_byte(data: str) -> Tuple[int, int]:
+        """Encode byte data, one byte per character, returns (bit buffer, bit count)"""
+        # Each character contributes the low 8 bits of its code point: the
+        # whole string as Latin-1 when it fits, otherwise the first byte of
+        # every 4-byte UTF-32-LE unit
+        try:
+            byte_values = data.encode('latin-1')
+        except UnicodeEncodeError:
+            byte_values = data.encode('utf-32-le', 'surrogatepass')[::4]
+        return int.from_bytes(byte_values, 'big'), 8 * len(byte_values)
 
     @staticmethod
-    def encode_kanji(data: str) -> List[int]:
+    def encode_kanji(data: str) -> Tuple[int, int]:
         """Encode Kanji data (Shift JIS)"""
-        bits = []
-
         # Simplified Kanji encoding
         # In a full implementation, this would handle Shift JIS encoding
         # For now, fall back to byte encoding
         return DataEncoder.encode_byte(data)
 
     @staticmethod
-    def encode(data: str, mode: EncodingMode, version: int) -> List[int]:
-        """Main encoding function"""
-        bits = []
-
-        # Add mode indicator (4 bits, MSB first)
-        mode_bits = DataEncoder.get_mode_indicator(mode)
-        bits.extend(mode_bits)
-
-        # Add character count (MSB first)
+    def encode(data: str, mode: EncodingMode, version: int) -> Tuple[int, int]:
+        """Main encoding function, returns (bit buffer, bit count) with MSB first"""
+        # Mode indicator (4 bits; the mode value is the indicator itself)
+        # followed by the character count, truncated to its field width
         char_count = len(data)
         count_bits = DataEncoder.get_char_count_bits(mode, version)
-        for i in range(count_bits - 1, -1, -1):
-            bits.append((char_count >> i) & 1)
+        buf = (mode.value << count_bits) | (char_count & ((1 << count_bits) - 1))
+        nbits = 4 + count_bits
 
         # Add encoded data
         if mode == EncodingMode.NUMERIC:
-            bits.extend(DataEncoder.encode_numeric(data))
+            data_buf, data_nbits = DataEncoder.encode_numeric(data)
         elif mode == EncodingMode.ALPHANUMERIC:
-            bits.extend(DataEncoder.encode_alphanumeric(data))
+            data_buf, data_nbits = DataEncoder.encode_alphanumeric(data)
         elif mode == EncodingMode.BYTE:
-            bits.extend(DataEncoder.encode_byte(data))
+            data_buf, data_nbits = DataEncoder.encode_byte(data)
         elif mode == EncodingMode.KANJI:
-            bits.extend(DataEncoder.encode_kanji(data))
+            data_buf, data_nbits = DataEncoder.encode_kanji(data)
+        else:
+            data_buf, data_nbits = 0, 0
 
-        return bits
+        return (buf << data_nbits) | data_buf, nbits + data_nbits
 
     @staticmethod
-    def add_terminator_and_padding(bits: List[int], total_bits: int) -> List[int]:
+    def add_terminator_and_padding(bits: Tuple[int, int], total_bits: int) -> Tuple[int, int]:
         """Add terminator and padding to reach required length"""
-        result = bits.copy()
+        buf, nbits = bits
 
         # Add terminator (up to 4 zeros)
-        terminator_length = min(4, total_bits - len(result))
-        result.extend([0] * terminator_length)
+        terminator_length = max(0, min(4, total_bits - nbits))
+        buf <<= terminator_length
+        nbits += terminator_length
 
         # Pad to byte boundary
-        while len(result) % 8 != 0:
-            result.append(0)
+        align = -nbits % 8
+        buf <<= align
+        nbits += align
 
         # Add padding bytes (0xEC, 0x11 alternating)
-        padding_patterns = [[1, 1, 1, 0, 1, 1, 0, 0], [0, 0, 0, 1, 0, 0, 0, 1]]
-        pattern_index = 0
-
-        while len(result) < total_bits:
-            result.extend(padding_patterns[pattern_index])
-            pattern_index = (pattern_index + 1) % 2
+        pad_bytes = max(0, (total_bits - nbits + 7) // 8)
+        buf = (buf << (8 * pad_bytes)) | _padding_value(pad_bytes)
+        nbits += 8 * pad_bytes
 
         # Truncate if too long (shouldn't happen in correct usage)
-        return result[:total_bits]
\ No newline at end of file
+        if nbits > total_bits:
+            buf >>= nbits - total_bits
+            nbits = total_bits
+
+        return buf, nbits
@@ -2,36 +2,163 @@
 Reed-Solomon error correction implementation for QR codes
 """
 
+from functools import lru_cache
 from typing import List
+
+import numpy as np
+
+try:
+    from numba import njit, vectorize
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    # Numba is optional: without it the kernel runs as plain Python
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
 from .constants import GENERATOR_POLYNOMIALS
 
 
+def _build_tables():
+    """Build the GF(256) exponential and logarithmic tables"""
+    exp_table = [0] * 512
+    log_table = [0] * 256
+    x = 1
+    for i in range(255):
+        exp_table[i] = x
+        exp_table[i + 255] = x
+        log_table[x] = i
+        x <<= 1
+        if x & 0x100:
+            x ^= 0x11D  # x^8 + x^4 + x^3 + x^2 + 1
+
+    exp_table[255] = exp_table[0]
+    return exp_table, log_table
+
+
+# GF(256) tables, built once at import and shared by every encoder
+EXP_TABLE, LOG_TABLE = _build_tables()
+
+
+def _gf_mul_batch(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """GF(256) products of two broadcastable arrays, without tables or branches
+
+    Carry-less multiplication by shift-and-XOR, then the 15-bit product is
+    folded back modulo the field polynomial. Zero operands need no special case.
+    """
+    a = np.asarray(a, dtype=np.uint16)
+    b = np.asarray(b, dtype=np.uint16)
+
+    product = np.zeros(np.broadcast(a, b).shape, dtype=np.uint16)
+    for bit in range(8):
+        product ^= (a << bit) * ((b >> bit) & 1)
+
+    # Reduce modulo x^8 + x^4 + x^3 + x^2 + 1, highest bit first
+    for bit in range(14, 7, -1):
+        product ^= ((product >> bit) & 1) * (0x11D << (bit - 8))
+
+    return product.astype(np.uint8)
+
+
+def _generator_products(generator: List[int]) -> np.ndarray:
+    """Every GF(256) multiple of a generator: row c holds c * generator"""
+    coefficients = np.arange(256, dtype=np.uint16)[:, None]
+    return _gf_mul_batch(coefficients, np.array(generator, dtype=np.uint16)[None, :])
+
+
+# Full 256 x 256 product table, a * b at index (a << 8) | b
+MUL_TABLE = _gf_mul_batch(np.arange(256)[:, None], np.arange(256)[None, :]).tobytes()
+_MUL_ARRAY = np.frombuffer(MUL_TABLE, dtype=np.uint8).reshape(256, 256)
+
+if NUMBA_AVAILABLE:
+    @vectorize(['uint8(uint8, uint8)'], cache=True)
+    def gf_mul(a, b):
+        """GF(256) product as a compiled ufunc; accepts uint8 operands only"""
+        return _MUL_ARRAY[a, b]
+else:
+    def gf_mul(a, b):
+        """GF(256) product of two broadcastable arrays, by table lookup"""
+        return _MUL_ARRAY[np.asarray(a, dtype=np.uint8), np.asarray(b, dtype=np.uint8)]
+
+# Per-degree multiplication tables, so one division step XORs a whole
+# precomputed row instead of multiplying coefficient by coefficient
+# (generator coefficients lowest degree first, as the encoder consumes them)
+_GENERATOR_PRODUCTS = {
+    degree: _generator_products(poly[::-1]) for degree, poly in GENERATOR_POLYNOMIALS.items()
+}
+
+
+@njit('void(uint8[::1], uint8[:, ::1], int64)', cache=True, boundscheck=False)
+def _rs_encode(message, generator_products, data_len):
+    """Polynomial division of message (data followed by zeros) in place"""
+    width = generator_products.shape[1]
+    for i in range(data_len):
+        coef = message[i]
+        if coef != 0:
+            # XOR with the generator multiplied by coef in GF(256)
+            row = generator_products[coef]
+            for j in range(width):
+                message[i + j] ^= row[j]
+
+
+# One entry per (data_len, ecc_count) block shape; the capacity table has 26
+# of them, so 64 keeps every shape warm while bounding arbitrary callers.
+# Building a matrix costs more than the encode it replaces: the cache only
+# pays off for steady-state throughput, not for one-off encodes.
+@lru_cache(maxsize=64)
+def _ecc_bit_matrix(data_len: int, ecc_count: int) -> np.ndarray:
+    """GF(2) matrix mapping the data bits of a block to its ECC bits
+
+    The division only XORs and multiplies by constants, so the ECC is a
+    linear function of the data bits. Running it on every single-bit
+    message at once (one NumPy row each) yields the matrix rows.
+    """
+    n_bits = 8 * data_len
+    message = np.zeros((n_bits, data_len + ecc_count), dtype=np.uint8)
+    rows = np.arange(n_bits)
+    message[rows, rows // 8] = 0x80 >> (rows % 8)
+
+    generator_products = _GENERATOR_PRODUCTS[ecc_count]
+    width = generator_products.shape[1]
+    for i in range(data_len):
+        active = np.flatnonzero(message[:, i])
+        if active.size:
+            message[active, i:i + width] ^= generator_products[message[active, i]]
+
+    matrix = np.unpackbits(message[:, data_len:], axis=1).astype(np.float32)
+    matrix.setflags(write=False)
+    return matrix
+
+
 class GaloisField:
     """Arithmetic operations in Galois Field GF(256)"""
 
     def __init__(self):
-        self.exp_table = [0] * 512
-        self.log_table = [0] * 256
-        self._init_tables()
-
-    def _init_tables(self):
-        """Initialize exponential and logarithmic tables"""
-        x = 1
-        for i in range(255):
-            self.exp_table[i] = x
-            self.exp_table[i + 255] = x
-            self.log_table[x] = i
-            x <<= 1
-            if x & 0x100:
-                x ^= 0x11D  # x^8 + x^4 + x^3 + x^2 + 1
-
-        self.exp_table[255] = self.exp_table[0]
+        self.exp_table = EXP_TABLE
+        self.log_table = LOG_TABLE
+        self.mul_table = MUL_TABLE
 
     def mul(self, a: int, b: int) -> int:
-        """Multiplication in GF(256)"""
-        if a == 0 or b == 0:
-            return 0
-        return self.exp_table[self.log_table[a] + self.log_table[b]]
+        """Multiplication in GF(256); both operands must be in 0..255"""
+        return self.mul_table[(a << 8) | b]
+
+    @staticmethod
+    def mul_vec(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """Element-wise multiplication in GF(256) of two broadcastable arrays
+
+        Operands are field elements: integers in 0..255 (any integer dtype or
+        Python ints). They are cast to uint8 for gf_mul; anything outside
+        that range raises ValueError instead of wrapping around.
+        """
+        a = np.asarray(a)
+        b = np.asarray(b)
+        for operand in (a, b):
+            if operand.size and (operand.min() < 0 or operand.max() > 255):
+                raise ValueError("GF(256) operands must be in 0..255")
+        return gf_mul(a.astype(np.uint8), b.astype(np.uint8))
 
     def div(self, a: int, b: int) -> int:
         """Division in GF(256)"""
@@ -56,41 +183,40 @@ class GaloisField:
         return self.exp_table[255 - self.log_table[x]]
 
 
+# Shared field instance: the tables never change once built
+GF = GaloisField()
+
+
 class ReedSolomonEncoder:
     """Reed-Solomon encoder for QR codes"""
 
-    def __init__(self):
-        self.gf = GaloisField()
+    gf = GF
 
-    def encode(self, data: List[int], ecc_count: int) -> List[int]:
+    @staticmethod
+    def encode(data: List[int], ecc_count: int) -> List[int]:
         """Encode data with Reed-Solomon error correction"""
         if ecc_count not in GENERATOR_POLYNOMIALS:
             raise ValueError(f"No generator polynomial for {ecc_count} ECC codewords")
 
-        # Create message polynomial (data + ecc_count zeros)
-        message = data + [0] * ecc_count
+        # Create message polynomial (data + ecc_count zeros) and divide it
+        # by the generator polynomial (Galois Field arithmetic)
+        if NUMBA_AVAILABLE:
+            message = np.zeros(len(data) + ecc_count, dtype=np.uint8)
+            message[:len(data)] = data
+            _rs_encode(message, _GENERATOR_PRODUCTS[ecc_count], len(data))
+            return message[-ecc_count:].tolist()
 
-        # Get generator polynomial
-        generator = GENERATOR_POLYNOMIALS[ecc_count]  # Already in correct order
-
-        # Perform polynomial division (Galois Field arithmetic)
-        for i in range(len(data)):
-            coef = message[i]
-            if coef != 0:
-                for j in range(len(generator)):
-                    # XOR with multiplication in GF(256)
-                    # Generator polynomial coefficients are from highest to lowest degree
-                    message[i + j] ^= self.gf.mul(generator[len(generator) - 1 - j], coef)
-
-        # Return ECC codewords (last ecc_count elements)
-        return message[-ecc_count:]
+        # Without numba: apply the cached linear map as one matrix product
+        # (float32 sums of 0/1 are exact here) and keep the parity of each bit
+        data_bits = np.unpackbits(np.asarray(data, dtype=np.uint8)).astype(np.float32)
+        ecc_bits = (data_bits @ _ecc_bit_matrix(len(data), ecc_count)).astype(np.int64) & 1
+        return np.packbits(ecc_bits.astype(np.uint8)).tolist()
 
 
 class ReedSolomonDecoder:
     """Reed-Solomon decoder for error correction (optional)"""
 
-    def __init__(self):
-        self.gf = GaloisField()
+    gf = GF
 
     def decode(self, received: List[int], ecc_count: int) -> List[int]:
         """Attempt to decode and correct errors"""
@@ -5,7 +5,7 @@ Example:
     >>> qr.save_png("hello.png")
 """
 
-from .core import QRCode, ErrorCorrectionLevel, EncodingMode
+from .core import QRCode, ErrorCorrectionLevel, EncodingMode, generate_qr
 from .constants import VERSION_INFO_TABLE, QR_CAPACITY_TABLE, FORMAT_INFO_TABLE
 
 __version__ = "1.0.0"
@@ -14,6 +14,7 @@ __description__ = "QR Code generator implementing ISO/IEC 18004"
 
 __all__ = [
     "QRCode",
+    "generate_qr",
     "ErrorCorrectionLevel",
     "EncodingMode",
     "VERSION_INFO_TABLE",
@@ -2,8 +2,40 @@
 QR code matrix generation and manipulation
 """
 
-from typing import List, Optional
-from .constants import ALIGNMENT_PATTERN_POSITIONS
+from functools import lru_cache
+from typing import List
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    # Numba is optional: without it the kernel runs as plain Python
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+from .constants import ALIGNMENT_PAIRS, ALIGNMENT_PATTERN_POSITIONS, MASK_PATTERNS
+
+
+# 5x5 alignment pattern, drawn centered on each alignment position
+_ALIGNMENT_PATTERN = np.array([
+    [True,  True,  True,  True,  True],
+    [True,  False, False, False, True],
+    [True,  False, True,  False, True],
+    [True,  False, False, False, True],
+    [True,  True,  True,  True,  True]
+])
+
+# Finder-like sequences penalized by rule 3, one byte per module
+_FINDER_LIKE_PATTERNS = (
+    bytes([1, 0, 1, 1, 1, 0, 1, 0, 0, 0, 0]),
+    bytes([0, 0, 0, 0, 1, 0, 1, 1, 1, 0, 1]),
+)
 
 
 class QRMatrix:
@@ -12,249 +44,46 @@ class QRMatrix:
     def __init__(self, version: int):
         self.version = version
         self.size = version * 4 + 17
-        self.matrix: List[List[Optional[bool]]] = [
-            [None for _ in range(self.size)] for _ in range(self.size)
-        ]
-        self._place_finder_patterns()
-        self._place_separators()
-        self._place_timing_patterns()
-        self._place_alignment_patterns()
-        self._place_dark_module()
-        self._reserve_format_areas()
-
-    def _place_finder_patterns(self):
-        """Place the three finder patterns"""
-        positions = [(0, 0), (self.size - 7, 0), (0, self.size - 7)]
-
-        for row, col in positions:
-            self._draw_finder_pattern(row, col)
-
-    def _draw_finder_pattern(self, row: int, col: int):
-        """Draw a single finder pattern"""
-        # Outer black square (7x7)
-        for i in range(7):
-            for j in range(7):
-                if 0 <= row + i < self.size and 0 <= col + j < self.size:
-                    self.matrix[row + i][col + j] = True
-
-        # Inner white square (5x5)
-        for i in range(1, 6):
-            for j in range(1, 6):
-                if 0 <= row + i < self.size and 0 <= col + j < self.size:
-                    self.matrix[row + i][col + j] = False
-
-        # Inner black square (3x3)
-        for i in range(2, 5):
-            for j in range(2, 5):
-                if 0 <= row + i < self.size and 0 <= col + j < self.size:
-                    self.matrix[row + i][col + j] = True
-
-    def _place_separators(self):
-        """Place separator patterns (white borders around finder patterns)"""
-        # Horizontal separators
-        for col in range(8):
-            # Top-left finder separator
-            if 7 < self.size:
-                self.matrix[7][col] = False
-            # Top-right finder separator
-            if self.size - 8 + col < self.size:
-                self.matrix[7][self.size - 8 + col] = False
-            # Bottom-left finder separator
-            if self.size - 8 < self.size:
-                self.matrix[self.size - 8][col] = False
-
-        # Vertical separators
-        for row in range(8):
-            # Top-left finder separator
-            if 7 < self.size:
-                self.matrix[row][7] = False
-            # Top-right finder separator
-            if self.size - 8 < self.size:
-                self.matrix[row][self.size - 8] = False
-            # Bottom-left finder separator
-            if self.size - 8 + row < self.size and 7 < self.size:
-                self.matrix[self.size - 8 + row][7] = False
-
-    def _place_timing_patterns(self):
-        """Place timing patterns"""
-        # Horizontal timing pattern (row 6)
-        for col in range(8, self.size - 8):
-            if col < self.size:
-                self.matrix[6][col] = ((col - 8) % 2 == 0)
-
-        # Vertical timing pattern (column 6)
-        for row in range(8, self.size - 8):
-            if row < self.size:
-                self.matrix[row][6] = ((row - 8) % 2 == 0)
-
-    def _place_alignment_patterns(self):
-        """Place alignment patterns"""
-        positions = ALIGNMENT_PATTERN_POSITIONS.get(self.version, [])
-
-        for center_row in positions:
-            for center_col in positions:
-                # Skip if overlaps with finder patterns
-                if self._overlaps_finder(center_row, center_col):
-                    continue
+        fixed_bits, is_reserved = _structure_template(version)
+        self.matrix = fixed_bits.copy()
+        self.is_function = is_reserved
+
+    @staticmethod
+    def build_structure_template(version: int):
+        """Function patterns of a version and the map of cells they reserve
 
-                self._draw_alignment_pattern(center_row, center_col)
-
-    def _overlaps_finder(self, row: int, col: int) -> bool:
-        """Check if alignment pattern overlaps with finder patterns"""
-        finder_positions = [(3, 3), (self.size - 4, 3), (3, self.size - 4)]
-
-        for fr, fc in finder_positions:
-            if abs(row - fr) <= 2 and abs(col - fc) <= 2:
-                return True
-        return False
-
-    def _draw_alignment_pattern(self, center_row: int, center_col: int):
-        """Draw a single alignment pattern (5x5)"""
-        # Alignment pattern structure:
-        # ■ ■ ■ ■ ■
-        # ■ □ □ □ ■
-        # ■ □ ■ □ ■
-        # ■ □ □ □ ■
-        # ■ ■ ■ ■ ■
-
-        pattern = [
-            [True,  True,  True,  True,  True],
-            [True,  False, False, False, True],
-            [True,  False, True,  False, True],
-            [True,  False, False, False, True],
-            [True,  True,  True,  True,  True]
-        ]
-
-        for i in range(5):
-            for j in range(5):
-                r, c = center_row + i - 2, center_col + j - 2
-                if 0 <= r < self.size and 0 <= c < self.size:
-                    self.matrix[r][c] = pattern[i][j]
-
-    def _place_dark_module(self):
-        """Place the dark module"""
-        self.matrix[self.size - 8][8] = True
-
-    def _reserve_format_areas(self):
-        """Reserve areas for format information"""
-        # These will be filled later with format and version information
-        # Horizontal format area (row 8)
-        for col in range(self.size):
-            if col < 9 or col >= self.size - 8:
-                if self.matrix[8][col] is None:
-                    self.matrix[8][col] = None  # Reserve for format info
-
-        # Vertical format area (column 8)
-        for row in range(self.size):
-            if row < 9 or row >= self.size - 8:
-                if self.matrix[row][8] is None:
-                    self.matrix[row][8] = None  # Reserve for format info
+        Returns (fixed_bits, is_reserved); both arrays are cached per version
+        and read-only, so callers copy before writing.
+        """
+        return _structure_template(version)
+
+    def __getitem__(self, index):
+        """Index the underlying module array, e.g. qr_matrix[row][col]"""
+        return self.matrix[index]
+
+    def copy(self) -> 'QRMatrix':
+        """Return an independent copy of this matrix"""
+        clone = QRMatrix(self.version)
+        clone.matrix[...] = self.matrix
+        return clone
 
     def place_data(self, data_bits: List[bool]):
         """Place data bits using the correct QR code data placement algorithm"""
-        bit_index = 0
-        total_bits = len(data_bits)
-
-        # QR code data placement: start from bottom-right, zigzag through columns
-        # Process pairs of columns from right to left
-        for right_col in range(self.size - 1, -1, -2):
-            # Skip timing column
-            if right_col == 6:
-                right_col -= 1
-
-            left_col = right_col - 1
-            if left_col == 6:
-                left_col -= 1
-
-            # Right column: bottom to top
-            for row in range(self.size - 1, -1, -1):
-                if row == 6:  # Skip timing row
-                    continue
+        rows, cols, positions = _placement_indices(self.version)
 
-                # Place in right column
-                if right_col >= 0 and self._is_data_cell(row, right_col):
-                    if bit_index < total_bits:
-                        self.matrix[row][right_col] = data_bits[bit_index]
-                        bit_index += 1
-                    else:
-                        self.matrix[row][right_col] = False
-
-                # Place in left column (top to bottom)
-                if left_col >= 0 and self._is_data_cell(row, left_col):
-                    if bit_index < total_bits:
-                        self.matrix[row][left_col] = data_bits[bit_index]
-                        bit_index += 1
-                    else:
-                        self.matrix[row][left_col] = False
-
-        # Fill any remaining cells
-        self._fill_remaining()
+        # Bit k of the zigzag goes to its k-th cell; cells past the data get False
+        bits = np.zeros(int(positions.max()) + 1, dtype=np.bool_)
+        count = min(len(data_bits), len(bits))
+        bits[:count] = np.asarray(data_bits[:count], dtype=np.bool_)
+        self.matrix[rows, cols] = bits[positions]
 
     def _is_data_cell(self, row: int, col: int) -> bool:
         """Check if a cell is part of the data area"""
-        # Finder patterns and separators
-        if row < 9 and col < 9:  # Top-left
-            return False
-        if row < 9 and col >= self.size - 8:  # Top-right
-            return False
-        if row >= self.size - 8 and col < 9:  # Bottom-left
-            return False
-
-        # Timing patterns
-        if row == 6 or col == 6:
-            return False
-
-        # Dark module
-        if row == self.size - 8 and col == 8:
-            return False
-
-        # Alignment patterns
-        positions = ALIGNMENT_PATTERN_POSITIONS.get(self.version, [])
-        for center_row in positions:
-            for center_col in positions:
-                if abs(row - center_row) <= 2 and abs(col - center_col) <= 2:
-                    return False
-
-        # Format areas (will be filled separately)
-        if row == 8 or col == 8:
-            return False
-
-        return True
-
-    def _fill_remaining(self):
-        """Fill any remaining None cells"""
-        for row in range(self.size):
-            for col in range(self.size):
-                if self.matrix[row][col] is None:
-                    self.matrix[row][col] = False
+        return not self.is_function[row, col]
 
     def apply_mask(self, mask_pattern: int):
         """Apply data masking pattern"""
-        for row in range(self.size):
-            for col in range(self.size):
-                if self._is_data_cell(row, col):
-                    if self._should_mask(row, col, mask_pattern):
-                        self.matrix[row][col] = not self.matrix[row][col]
-
-    def _should_mask(self, row: int, col: int, mask_pattern: int) -> bool:
-        """Determine if a cell should be masked"""
-        if mask_pattern == 0:
-            return (row + col) % 2 == 0
-        elif mask_pattern == 1:
-            return row % 2 == 0
-        elif mask_pattern == 2:
-            return col % 3 == 0
-        elif mask_pattern == 3:
-            return (row + col) % 3 == 0
-        elif mask_pattern == 4:
-            return (row // 2 + col // 3) % 2 == 0
-        elif mask_pattern == 5:
-            return ((row * col) % 2 + (row * col) % 3) == 0
-        elif mask_pattern == 6:
-            return ((row * col) % 2 + (row * col) % 3) % 2 == 0
-        elif mask_pattern == 7:
-            return ((row + col) % 2 + (row * col) % 3) % 2 == 0
-        return False
+        self.matrix ^= _mask_flips(self.version)[mask_pattern]
 
     def add_format_info(self, format_bits: int):
         """Add format information to the matrix according to ISO/IEC 18004"""
@@ -270,7 +99,7 @@ class QRMatrix:
                 if 8 == 8 and col == 8:  # Dark module at [8][8]
                     continue
                 bit_value = bool((format_bits >> (14 - i)) & 1)
-                self.matrix[8][col] = bit_value
+                self.matrix[8, col] = bit_value
 
         # Vertical format information (column 8)
         # Positions: 0,1,2,3,4,5,7,8,14,15,16,17,18,19,20 (skipping 6=timing, 9-13=alignment/finder)
@@ -282,7 +111,7 @@ class QRMatrix:
                 if row == self.size - 8 and 8 == 8:  # Dark module at [size-8][8]
                     continue
                 bit_value = bool((format_bits >> (14 - i)) & 1)
-                self.matrix[row][8] = bit_value
+                self.matrix[row, 8] = bit_value
 
     def add_version_info(self, version_bits: int):
         """Add version information for versions 7-40"""
@@ -297,7 +126,7 @@ class QRMatrix:
                 row = i
                 col = self.size - 11 + j
                 if bit_pos < 18:
-                    self.matrix[row][col] = bool((version_bits >> (17 - bit_pos)) & 1)
+                    self.matrix[row, col] = bool((version_bits >> (17 - bit_pos)) & 1)
                     bit_pos += 1
 
         # Bottom-left area
@@ -307,67 +136,274 @@ class QRMatrix:
                 row = self.size - 11 + i
                 col = j
                 if bit_pos < 18:
-                    self.matrix[row][col] = bool((version_bits >> (17 - bit_pos)) & 1)
+                    self.matrix[row, col] = bool((version_bits >> (17 - bit_pos)) & 1)
                     bit_pos += 1
 
-    def calculate_penalty_score(self) -> int:
-        """Calculate penalty score for mask pattern evaluation"""
+    def calculate_penalty_score(self, limit: float = float('inf')) -> int:
+        """Calculate penalty score for mask pattern evaluation
+
+        Once the running score reaches `limit` the remaining rules are
+        skipped and that partial score (already >= limit) is returned.
+        """
         score = 0
         size = self.size
+        m = self.matrix
 
         # Rule 1: Adjacent modules in row/column with same color
-        for row in range(size):
-            run_length = 1
-            for col in range(1, size):
-                if self.matrix[row][col] == self.matrix[row][col - 1]:
-                    run_length += 1
-                else:
-                    if run_length >= 5:
-                        score += run_length - 2
-                    run_length = 1
-            if run_length >= 5:
-                score += run_length - 2
-
-        for col in range(size):
-            run_length = 1
-            for row in range(1, size):
-                if self.matrix[row][col] == self.matrix[row - 1][col]:
-                    run_length += 1
-                else:
-                    if run_length >= 5:
-                        score += run_length - 2
-                    run_length = 1
-            if run_length >= 5:
-                score += run_length - 2
+        score += self._run_length_penalty(m) + self._run_length_penalty(m.T)
 
-        # Rule 2: 2x2 blocks of same color
-        for row in range(size - 1):
-            for col in range(size - 1):
-                if (self.matrix[row][col] == self.matrix[row][col + 1] ==
-                    self.matrix[row + 1][col] == self.matrix[row + 1][col + 1]):
-                    score += 3
+        if score >= limit:
+            return score
 
-        # Rule 3: Specific patterns (finder-like)
-        pattern1 = [True, False, True, True, True, False, True, False, False, False, False]
-        pattern2 = [False, False, False, False, True, False, True, True, True, False, True]
+        # Rule 2: 2x2 blocks of same color
+        top_left = m[:-1, :-1]
+        same_block = ((top_left == m[:-1, 1:]) & (top_left == m[1:, :-1]) &
+                      (top_left == m[1:, 1:]))
+        score += 3 * int(np.count_nonzero(same_block))
 
-        for row in range(size):
-            for col in range(size - len(pattern1) + 1):
-                row_slice = [self.matrix[row][col + i] for i in range(len(pattern1))]
-                if row_slice == pattern1 or row_slice == pattern2:
-                    score += 40
+        if score >= limit:
+            return score
 
-        for col in range(size):
-            for row in range(size - len(pattern1) + 1):
-                col_slice = [self.matrix[row + i][col] for i in range(len(pattern1))]
-                if col_slice == pattern1 or col_slice == pattern2:
-                    score += 40
+        # Rule 3: Specific patterns (finder-like)
+        # Rows, then columns, as one byte string each, every line followed by
+        # a 2 byte so that no match spans two lines. Neither pattern can
+        # overlap itself, so the non-overlapping bytes.count finds them all.
+        for lines in (m, m.T):
+            buffer = np.full((size, size + 1), 2, dtype=np.uint8)
+            buffer[:, :size] = lines
+            data = buffer.tobytes()
+            score += 40 * sum(data.count(pattern) for pattern in _FINDER_LIKE_PATTERNS)
+
+        if score >= limit:
+            return score
 
         # Rule 4: Balance of black and white modules
-        black_count = sum(sum(1 for cell in row if cell) for row in self.matrix)
+        black_count = int(np.count_nonzero(m))
         total_count = size * size
         percentage = (black_count * 100) // total_count
         deviation = abs(percentage - 50)
         score += (deviation // 5) * 10
 
         return score
+
+    @staticmethod
+    def _run_length_penalty(lines: np.ndarray) -> int:
+        """Rule 1 score of every row of `lines`: run_length - 2 per run of 5 or more"""
+        # A run starts at the beginning of each line and wherever the color flips
+        starts = np.ones(lines.shape, dtype=np.bool_)
+        starts[:, 1:] = lines[:, 1:] != lines[:, :-1]
+
+        # Lines are laid out back to back, so consecutive starts bound each run
+        lengths = np.diff(np.append(np.flatnonzero(starts), starts.size))
+        long_runs = lengths[lengths >= 5]
+        return int((long_runs - 2).sum())
+
+
+# Rule 3 sequences as 11-bit windows, first module in the highest bit
+_FINDER_LIKE_WINDOW_1 = 0b10111010000
+_FINDER_LIKE_WINDOW_2 = 0b00001011101
+
+
+@njit(cache=True, boundscheck=False)
+def score_mask(modules, data_cells, mask_grid):
+    """Penalty score of `modules` once masked by `mask_grid` on the data cells
+
+    The masked grid is built on the fly and scored in two fused passes,
+    rows then columns, with the same rules as calculate_penalty_score.
+    """
+    size = modules.shape[0]
+    grid = np.empty((size, size), dtype=np.uint8)
+    for r in range(size):
+        for c in range(size):
+            grid[r, c] = modules[r, c] ^ (mask_grid[r, c] & data_cells[r, c])
+
+    score = 0
+    black_count = 0
+
+    # Rows: rules 1 and 3 along the row, rule 2 with the next row, rule 4
+    for r in range(size):
+        run = 1
+        window = 0
+        for c in range(size):
+            cell = grid[r, c]
+            black_count += cell
+            if c > 0:
+                if cell == grid[r, c - 1]:
+                    run += 1
+                else:
+                    if run >= 5:
+                        score += run - 2
+                    run = 1
+                if r + 1 < size and cell == grid[r, c - 1] == grid[r + 1, c - 1] == grid[r + 1, c]:
+                    score += 3
+            window = ((window << 1) | cell) & 0x7FF
+            if c >= 10 and (window == _FINDER_LIKE_WINDOW_1 or window == _FINDER_LIKE_WINDOW_2):
+                score += 40
+        if run >= 5:
+            score += run - 2
+
+    # Columns: rules 1 and 3 along the column
+    for c in range(size):
+        run = 1
+        window = 0
+        for r in range(size):
+            cell = grid[r, c]
+            if r > 0:
+                if cell == grid[r - 1, c]:
+                    run += 1
+                else:
+                    if run >= 5:
+                        score += run - 2
+                    run = 1
+            window = ((window << 1) | cell) & 0x7FF
+            if r >= 10 and (window == _FINDER_LIKE_WINDOW_1 or window == _FINDER_LIKE_WINDOW_2):
+                score += 40
+        if run >= 5:
+            score += run - 2
+
+    percentage = (black_count * 100) // (size * size)
+    score += (abs(percentage - 50) // 5) * 10
+    return score
+
+
+def _draw_finder_pattern(modules: np.ndarray, row: int, col: int):
+    """Draw a single finder pattern"""
+    # Outer black square (7x7)
+    modules[row:row + 7, col:col + 7] = True
+
+    # Inner white square (5x5)
+    modules[row + 1:row + 6, col + 1:col + 6] = False
+
+    # Inner black square (3x3)
+    modules[row + 2:row + 5, col + 2:col + 5] = True
+
+
+def _draw_alignment_pattern(modules: np.ndarray, center_row: int, center_col: int):
+    """Draw a single alignment pattern (5x5)"""
+    # Alignment pattern structure:
+    # ■ ■ ■ ■ ■
+    # ■ □ □ □ ■
+    # ■ □ ■ □ ■
+    # ■ □ □ □ ■
+    # ■ ■ ■ ■ ■
+    modules[center_row - 2:center_row + 3, center_col - 2:center_col + 3] = _ALIGNMENT_PATTERN
+
+
+@lru_cache(maxsize=None)
+def _structure_template(version: int):
+    """Function patterns of a version and the map of cells they reserve
+
+    Both arrays are cached per version and read-only.
+    """
+    size = version * 4 + 17
+    modules = np.zeros((size, size), dtype=np.bool_)
+
+    # Finder patterns
+    for row, col in ((0, 0), (size - 7, 0), (0, size - 7)):
+        _draw_finder_pattern(modules, row, col)
+
+    # Separators (white borders around finder patterns)
+    modules[7, :8] = False             # Top-left finder separator
+    modules[7, size - 8:] = False      # Top-right finder separator
+    modules[size - 8, :8] = False      # Bottom-left finder separator
+    modules[:8, 7] = False             # Top-left finder separator
+    modules[:8, size - 8] = False      # Top-right finder separator
+    modules[size - 8:, 7] = False      # Bottom-left finder separator
+
+    # Timing patterns: alternating modules starting dark at index 8
+    timing = np.arange(8, size - 8) % 2 == 0
+    modules[6, 8:size - 8] = timing
+    modules[8:size - 8, 6] = timing
+
+    # Alignment patterns
+    for center_row, center_col in ALIGNMENT_PAIRS.get(version, ()):
+        _draw_alignment_pattern(modules, center_row, center_col)
+
+    # Dark module
+    modules[size - 8, 8] = True
+
+    modules.setflags(write=False)
+    is_reserved = ~_data_cell_mask(version)
+    is_reserved.setflags(write=False)
+    return modules, is_reserved
+
+
+@lru_cache(maxsize=None)
+def _data_cell_mask(version: int) -> np.ndarray:
+    """Boolean map of the cells of a version that carry data and get masked"""
+    size = version * 4 + 17
+    mask = np.ones((size, size), dtype=bool)
+
+    # Finder patterns and separators
+    mask[:9, :9] = False                # Top-left
+    mask[:9, size - 8:] = False         # Top-right
+    mask[size - 8:, :9] = False         # Bottom-left
+
+    # Timing patterns
+    mask[6, :] = False
+    mask[:, 6] = False
+
+    # Dark module
+    mask[size - 8, 8] = False
+
+    # Alignment patterns
+    positions = ALIGNMENT_PATTERN_POSITIONS.get(version, [])
+    for center_row in positions:
+        for center_col in positions:
+            mask[center_row - 2:center_row + 3, center_col - 2:center_col + 3] = False
+
+    # Format areas (will be filled separately)
+    mask[8, :] = False
+    mask[:, 8] = False
+
+    mask.setflags(write=False)
+    return mask
+
+
+@lru_cache(maxsize=None)
+def _mask_flips(version: int) -> np.ndarray:
+    """The eight mask patterns of a version, already restricted to its data cells"""
+    size = version * 4 + 17
+    flips = MASK_PATTERNS[:, :size, :size] & _data_cell_mask(version)
+    flips.setflags(write=False)
+    return flips
+
+
+@lru_cache(maxsize=None)
+def _placement_indices(version: int):
+    """Cells visited by the data zigzag of a version, in placement order
+
+    Returns (rows, cols, positions): every data cell once, with the index in
+    the zigzag of its last visit, since later visits overwrite earlier ones.
+    """
+    size = version * 4 + 17
+
+    # QR code data placement: start from bottom-right, zigzag through columns
+    # Process pairs of columns from right to left, skipping the timing column
+    right_cols = np.arange(size - 1, -1, -2)
+    right_cols[right_cols == 6] -= 1
+    left_cols = right_cols - 1
+    left_cols[left_cols == 6] -= 1
+    column_order = np.stack([right_cols, left_cols], axis=1)
+
+    # Both columns: bottom to top, skipping the timing row
+    row_order = np.arange(size - 1, -1, -1)
+    row_order = row_order[row_order != 6]
+
+    # Every (row, col) of the walk in order, then only the data cells of it
+    cols = np.broadcast_to(column_order[:, None, :], (len(column_order), len(row_order), 2)).ravel()
+    rows = np.broadcast_to(row_order[None, :, None], (len(column_order), len(row_order), 2)).ravel()
+    valid = cols >= 0
+    rows, cols = rows[valid], cols[valid]
+    on_data = _data_cell_mask(version)[rows, cols]
+    rows, cols = rows[on_data], cols[on_data]
+
+    # Keep the last visit of cells the walk passes twice
+    flat = (rows * size + cols)[::-1]
+    _, first_from_end = np.unique(flat, return_index=True)
+    positions = len(flat) - 1 - first_from_end
+
+    rows, cols = rows[positions], cols[positions]
+    for array in (rows, cols, positions):
+        array.setflags(write=False)
+    return rows, cols, positions